@@ -0,0 +1,232 @@
+"""Benchmarks for data loading and every dashboard figure.
+
+Runs entirely on a synthetic export, so no real data is needed:
+
+    python -m benchmarks.run --rows 100000 --output before.json
+    python -m benchmarks.run --rows 100000 --output after.json
+    python -m benchmarks.run --compare before.json after.json
+"""
+import argparse
+import importlib
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import plotly.io as pio
+from plotly.utils import PlotlyJSONEncoder
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from benchmarks.synthetic import write_export  # noqa: E402
+
+BENCH_FILE_NAME = "incidents-export-benchmark.csv"
+# Matches a slice of the synthetic titles ("Company <n>")
+SEARCH_SAMPLE = "company 1*"
+
+
+
+def time_case(func, repeat, warmup=1):
+    for _ in range(warmup):
+        func()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return {
+        "median_ms": statistics.median(samples), "min_ms": min(samples),
+        "mean_ms": statistics.fmean(samples), "repeat": repeat,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=REPO_ROOT, text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def first_page():
+    # A fresh server process up to its first page, which must not wait for
+    # the data; it exits before the background load gets far
+    code = "import os, dashboard; dashboard.server.test_client().get('/_dash-layout'); os._exit(0)"
+    subprocess.run([sys.executable, "-c", code], check=True, capture_output=True,
+                   env={**os.environ, "PYTHONPATH": REPO_ROOT})
+
+
+def load_cases(file_name, rows):
+    from components.data_handler import load_and_clean_data, stream_aggregates, pyarrow
+    from components.dedup import duplicate_of
+    from components.incident_store import IncidentStore
+    from components.multi_label import LabelMatrix
+    from components.text_index import TextIndex
+
+    df, _, _ = load_and_clean_data(file_name, use_cache=False)
+    cases = {
+        "load/csv": lambda: load_and_clean_data(file_name, use_cache=False),
+        "load/stream": lambda: stream_aggregates(file_name, chunk_size=max(rows // 4, 1)),
+        # Replaces the old df.explode("Techniques Used") step
+        "explode/technique_matrix": lambda: LabelMatrix(df["Techniques Used"]),
+        "load/store": lambda: IncidentStore(df),
+        "load/search_index": lambda: TextIndex.from_frame(df),
+        "load/dedup": lambda: duplicate_of(df),
+        "startup/first_page": first_page,
+    }
+    if pyarrow is not None:
+        load_and_clean_data(file_name)  # writes the Parquet cache
+        cases["load/parquet"] = lambda: load_and_clean_data(file_name)
+    return cases
+
+
+def figure_cases(dashboard):
+    from components.figure_patch import figure_patch
+    from components.registry import FIGURE_REGISTRY, SERIES_REGISTRY
+
+    dashboard.dataset.load()
+    # Sample selections: the first two options of each dropdown; other
+    # controls (radio items, date pickers) keep their defaults
+    dropdown_values = dashboard.dropdown_values(dashboard.dataset.store)
+
+    def sample(filter_id):
+        if filter_id == "incident-search":
+            return SEARCH_SAMPLE
+        if filter_id == "unique-incidents":
+            return ["unique"]
+        return list(dropdown_values[filter_id][:2]) if filter_id in dropdown_values else None
+
+    def view_uncached(query, unique):
+        store = dashboard.dataset.store
+        store._views.clear()
+        return store.view(query, unique)
+
+    def render(output_ids, filtered):
+        # Uncached build plus JSON serialisation: what one callback costs
+        for output_id in output_ids:
+            filter_ids, build = FIGURE_REGISTRY[output_id]
+            args = [sample(f) if filtered else None for f in filter_ids]
+            pio.to_json(build.__wrapped__(*args), validate=False)
+
+    def render_lean(output_ids):
+        # Data-only Patch against the (cached) unfiltered figure
+        for output_id in output_ids:
+            filter_ids, build = FIGURE_REGISTRY[output_id]
+            patch = figure_patch(build(*[None] * len(filter_ids)),
+                                 *SERIES_REGISTRY[output_id](*[sample(f) for f in filter_ids]))
+            json.dumps(patch.to_plotly_json(), cls=PlotlyJSONEncoder)
+
+    cases = {}
+    for output_id, (filter_ids, build) in FIGURE_REGISTRY.items():
+        cases[f"builder/{output_id}"] = lambda b=build, n=len(filter_ids): b.__wrapped__(*[None] * n)
+        if filter_ids:
+            cases[f"builder/{output_id}/filtered"] = (
+                lambda b=build, f=filter_ids: b.__wrapped__(*[sample(x) for x in f])
+            )
+    cases["search/query"] = lambda: dashboard.dataset.store.text_index.search(SEARCH_SAMPLE)
+    # Restricting the store builds cubes over the matches, once per query
+    cases["search/store"] = lambda: view_uncached(SEARCH_SAMPLE, False)
+    cases["unique/store"] = lambda: view_uncached(None, True)
+    for filter_id in [*dropdown_values, "incident-search", "unique-incidents"]:
+        affected = [o for o, (f, _) in FIGURE_REGISTRY.items() if filter_id in f]
+        cases[f"callback/{filter_id}"] = lambda a=affected: render(a, True)
+        lean = [o for o in affected if o in SERIES_REGISTRY]
+        if lean:
+            cases[f"callback-lean/{filter_id}"] = lambda a=lean: render_lean(a)
+    cases["callback/initial-page"] = lambda: render(list(FIGURE_REGISTRY), False)
+    return cases
+
+
+def run(args):
+    with tempfile.TemporaryDirectory(prefix="dashboard-bench-") as workdir:
+        os.makedirs(os.path.join(workdir, "data"))
+        write_export(
+            os.path.join(workdir, "data", BENCH_FILE_NAME), n_rows=args.rows, n_actors=args.actors,
+            n_techniques=args.techniques, mean_techniques=args.mean_techniques, seed=args.seed,
+        )
+        # The data layer reads data/<file> relative to the working directory
+        cwd = os.getcwd()
+        os.chdir(workdir)
+        os.environ["DASHBOARD_FILE"] = BENCH_FILE_NAME
+        try:
+            cases = load_cases(BENCH_FILE_NAME, args.rows)
+            cases.update(figure_cases(importlib.import_module("dashboard")))
+
+            results = {}
+            for name, func in cases.items():
+                if args.filter and args.filter not in name:
+                    continue
+                repeat = args.load_repeat if name.startswith(("load/", "explode/", "startup/")) else args.repeat
+                results[name] = time_case(func, repeat)
+                print(f"{name:<60} {results[name]['median_ms']:>10.2f} ms")
+        finally:
+            os.chdir(cwd)
+
+    return {
+        "meta": {
+            "commit": git_commit(), "python": platform.python_version(), "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"), "rows": args.rows, "actors": args.actors,
+            "techniques": args.techniques, "mean_techniques": args.mean_techniques, "seed": args.seed,
+        },
+        "results": results,
+    }
+
+
+def compare(base_path, new_path, threshold):
+    with open(base_path) as f:
+        base = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+
+    regressions = 0
+    print(f"{'case':<60} {'base ms':>10} {'new ms':>10} {'ratio':>7}")
+    for name in sorted(set(base["results"]) | set(new["results"])):
+        if name not in base["results"] or name not in new["results"]:
+            print(f"{name:<60} {'only in ' + ('new' if name in new['results'] else 'base'):>29}")
+            continue
+        before = base["results"][name]["median_ms"]
+        after = new["results"][name]["median_ms"]
+        ratio = after / before if before else float("inf")
+        flag = ""
+        if ratio > 1 + threshold:
+            flag = "  REGRESSION"
+            regressions += 1
+        print(f"{name:<60} {before:>10.2f} {after:>10.2f} {ratio:>7.2f}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--actors", type=int, default=5)
+    parser.add_argument("--techniques", type=int, default=8)
+    parser.add_argument("--mean-techniques", type=float, default=1.5,
+                        help="mean number of techniques for incidents with known techniques")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--load-repeat", type=int, default=3)
+    parser.add_argument("--filter", help="only run cases whose name contains this text")
+    parser.add_argument("--output", help="write the JSON report here")
+    parser.add_argument("--compare", nargs=2, metavar=("BASE", "NEW"), help="compare two JSON reports")
+    parser.add_argument("--threshold", type=float, default=0.1,
+                        help="slowdown ratio above 1 reported as a regression (default 0.1 = 10%%)")
+    args = parser.parse_args()
+
+    if args.compare:
+        sys.exit(1 if compare(*args.compare, args.threshold) else 0)
+
+    report = run(args)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+
+# ==============================================================================
+# SYNTHETIC INCIDENT EXPORT
+# ==============================================================================
+# Writes a semicolon-separated CSV with the same columns as the real incident
+# exports, so benchmarks can run without any real data.
+BASE_ACTORS = ["Unknown", "Extern (Intentional)", "Intern (Accidental)", "Intern (Intentional)", "Extern (Accidental)"]
+BASE_TECHNIQUES = [
+    "Drive-by Compromise", "Phishing", "Exploit Public-Facing Application", "Valid Accounts",
+    "Content Injection", "Scheduled Transfer", "Automated Exfiltration", "Brute Force",
+]
+ROOT_CAUSES = ["Unknown", "Disruption of Functionality", "Challenge/Fun", "Profit-Oriented", "Espionage",
+               "Strategic Pre-Positioning", "Influence"]
+ASSET_TYPES = ["Unknown", "Network", "Hardware", "Software, Services, Systems", "Services provided by supplier"]
+PROTECTION_STATES = ["Unknown", "Strong", "Weak"]
+LINDDUN = ["Linkability", "Identifiability", "Non-repudiation", "Detectability",
+           "Disclosure of information", "Unawareness", "Non-compliance"]
+
+
+def labels(base, n):
+    # Real names first, then numbered extras for higher cardinality
+    return list(base[:n]) + [f"{base[0]} {i}" for i in range(len(base), n)]
+
+
+def skewed_choice(rng, values, size):
+    # Zipf-like skew, like the real exports where "Unknown" dominates
+    weights = 1 / np.arange(1, len(values) + 1)
+    return rng.choice(np.asarray(values, dtype=object), size=size, p=weights / weights.sum())
+
+
+def generate_incidents(n_rows=10_000, n_actors=5, n_techniques=8, unknown_technique_share=0.7,
+                       mean_techniques=1.5, seed=0):
+    """Synthetic export as a DataFrame.
+
+    Incidents without a known technique get "Unknown"; the others draw
+    1 + Poisson(mean_techniques - 1) distinct techniques.
+    """
+    rng = np.random.default_rng(seed)
+    actors = labels(BASE_ACTORS, n_actors)
+    techniques = np.asarray(labels(BASE_TECHNIQUES, n_techniques), dtype=object)
+
+    counts = np.minimum(1 + rng.poisson(max(mean_techniques - 1, 0), n_rows), len(techniques))
+    counts[rng.random(n_rows) < unknown_technique_share] = 0
+    technique_text = [
+        ", ".join(rng.choice(techniques, k, replace=False)) if k else "Unknown" for k in counts
+    ]
+    linddun = [", ".join(rng.choice(LINDDUN, k, replace=False)) for k in rng.integers(1, 4, n_rows)]
+    protection = skewed_choice(rng, PROTECTION_STATES, n_rows)
+    protection[rng.random(n_rows) < 0.01] = None
+
+    return pd.DataFrame({
+        "Incident ID": [f"INC-{i:08d}" for i in range(n_rows)],
+        "Title (Company)": [f"Company {i}" for i in rng.integers(0, max(n_rows // 4, 1), n_rows)],
+        "Description": [f"Incident {i} exposed records via {t}" for i, t in enumerate(technique_text)],
+        "Date of occurrence": (pd.Timestamp("2020-01-01")
+                               + pd.to_timedelta(rng.integers(0, 5 * 365, n_rows), unit="D")).strftime("%Y-%m-%d"),
+        "Jurisdiction": rng.choice(["EU", "Non-EU", "EU, Non-EU"], n_rows),
+        "LINDDUN categories": linddun,
+        "Data exposure score": rng.integers(-1, 4, n_rows),
+        "Identification score": rng.integers(-1, 4, n_rows),
+        "Data Sensitivity score": rng.integers(-1, 5, n_rows),
+        "Threat Actor": skewed_choice(rng, actors, n_rows),
+        "Techniques Used": technique_text,
+        "Data Protection State": protection,
+        "Root Cause (Why)": skewed_choice(rng, ROOT_CAUSES, n_rows),
+        "Asset Type": skewed_choice(rng, ASSET_TYPES, n_rows),
+        "Source": rng.choice(["DSGVO", "EuRepoC", "HIBP"], n_rows),
+    })
+
+
+def write_export(path, **kwargs):
+    generate_incidents(**kwargs).to_csv(path, sep=";", index=False, encoding="utf-8-sig")
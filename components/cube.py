@@ -0,0 +1,129 @@
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from components.metrics import timed
+
+# ==============================================================================
+# PRE-AGGREGATED COUNT CUBES
+# ==============================================================================
+# name: (counts incident x technique pairs, dimensions)
+# Incident-level counts and technique-level counts (one per incident x
+# technique) live in separate cubes so that incidents with several techniques
+# are not over-counted.
+CUBES = {
+    "incidents": (False, [
+        "Threat Actor", "Data Protection State", "Data Sensitivity score",
+        "Root Cause (Why)", "Motivation", "Asset Type", "Asset Label",
+        "Exposure Label", "Sophistication_Category",
+        # Derived from the score, so it adds no cells; lets the query API filter on it
+        "Sensitivity_Label",
+    ]),
+    "techniques": (True, ["Threat Actor", "Techniques Used", "Sensitivity_Label"]),
+    "combinations": (False, ["Threat Actor", "Sophistication_Category", "Combination"]),
+    # Per-day cells behind the trend section (see Timeline)
+    "daily": (False, ["Incident Date", "Threat Actor", "Data Protection State"]),
+    "daily_techniques": (True, ["Incident Date", "Threat Actor", "Techniques Used"]),
+}
+
+
+class CountCube:
+    """Incident counts per non-empty combination of dimension values.
+
+    Cells are stored sparsely (one row per observed combination), so slicing
+    and summing costs O(cells) rather than O(incidents).
+    """
+
+    def __init__(self, cells):
+        self.cells = cells
+
+    @classmethod
+    def from_frame(cls, df, dimensions, weights=None):
+        if weights is None:
+            cells = df.groupby(dimensions, observed=True, dropna=False).size().reset_index(name="count")
+        else:
+            cells = (df[dimensions].assign(count=weights)
+                     .groupby(dimensions, observed=True, dropna=False)["count"].sum()
+                     .reset_index())
+        return cls(cells)
+
+    @classmethod
+    def merge(cls, cubes):
+        dimensions = cubes[0].dimensions
+        columns = {}
+        for col in dimensions:
+            parts = [cube.cells[col] for cube in cubes]
+            if all(isinstance(part.dtype, pd.CategoricalDtype) for part in parts):
+                # Partial cubes from different chunks carry different categories
+                columns[col] = union_categoricals(parts, sort_categories=True)
+            else:
+                columns[col] = pd.concat(parts, ignore_index=True)
+        columns["count"] = np.concatenate([cube.cells["count"].to_numpy() for cube in cubes])
+        cells = (pd.DataFrame(columns)
+                 .groupby(dimensions, observed=True, dropna=False)["count"].sum()
+                 .reset_index())
+        return cls(cells)
+
+    @property
+    def dimensions(self):
+        return [col for col in self.cells.columns if col != "count"]
+
+    def categorise(self):
+        return CountCube(self.cells.astype({col: "category" for col in self.dimensions}))
+
+    def counts(self, filters, by, name="Count"):
+        with timed("filter"):
+            keep = np.ones(len(self.cells), dtype=bool)
+            for col, values in filters.items():
+                if values:
+                    keep &= self.cells[col].isin(values).to_numpy()
+        with timed("aggregate"):
+            return (self.cells[keep]
+                    .groupby(by, observed=True)["count"].sum()
+                    .reset_index(name=name))
+
+    def values(self, col):
+        """Sorted distinct non-null values of a dimension."""
+        return sorted(self.cells[col].dropna().unique())
+
+
+class CubeMerger:
+    """Merges partial cubes as they arrive, e.g. one per streamed chunk.
+
+    Partial cubes are buffered until they hold at least as many cells as the
+    merged cube, and only then merged into it. Each merge then costs at most
+    twice the buffered cells, so the total stays linear in the number of
+    chunks instead of re-grouping the whole running cube after every chunk.
+    """
+
+    def __init__(self):
+        self.merged = None
+        self.pending = []
+        self.pending_cells = 0
+
+    def add(self, cube):
+        self.pending.append(cube)
+        self.pending_cells += len(cube.cells)
+        if self.merged is None or self.pending_cells >= len(self.merged.cells):
+            self.flush()
+
+    def flush(self):
+        if self.pending:
+            self.merged = CountCube.merge(([self.merged] if self.merged is not None else []) + self.pending)
+            self.pending, self.pending_cells = [], 0
+        return self.merged
+
+
+def build_cubes(df, techniques):
+    # Technique-level cells come straight from the sparse matrix entries, so
+    # only the few dimension columns are ever repeated per technique
+    rows, codes, weights = techniques.entries()
+    cubes = {}
+    for name, (per_technique, dimensions) in CUBES.items():
+        if per_technique:
+            pairs = {col: df[col].take(rows).reset_index(drop=True) for col in dimensions if col != "Techniques Used"}
+            pairs["Techniques Used"] = pd.Categorical.from_codes(codes, techniques.labels)
+            cubes[name] = CountCube.from_frame(pd.DataFrame(pairs), dimensions, weights=weights)
+        else:
+            cubes[name] = CountCube.from_frame(df, dimensions)
+    return cubes
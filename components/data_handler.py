@@ -1,38 +1,313 @@
-import pandas as pd
+import glob
+import hashlib
+import json
 import os
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from components.cube import CUBES, CubeMerger, build_cubes
+from components.dedup import Fingerprints
+from components.incident_store import CATEGORICAL_COLUMNS
+from components.schema import summarise, validate
+from components.multi_label import MULTI_LABEL_COLUMNS, LabelMatrix
+from components.text_index import TEXT_COLUMNS, TextIndex
+
+try:
+    import pyarrow  # noqa: F401  (enables the Parquet cache)
+except ImportError:
+    pyarrow = None
+
+DATA_DIR = "data"
+CACHE_DIR = os.path.join(DATA_DIR, ".cache")
+# Bumped whenever clean_data or the cubes change what is stored, so stale
+# caches (Parquet and shared stores) are rebuilt
+CACHE_FORMAT = 11
+
+SOPHISTICATION_LEVELS = ["Unknown Technique", "Single Technique", "Multi-Technique (2–3)", "Multi-Stage (4+)"]
+UNKNOWN_TECHNIQUE_TEXT = {'', 'nan', 'unknown', 'none'}
 
 # ==============================================================================
 # 2. DATA LOADING & INITIAL CLEANING
 # ==============================================================================
-def load_and_clean_data(file_name):
-    df = pd.read_csv(
-        "data/"+file_name, 
-        sep=";", 
-        encoding="utf-8-sig"
-        )
-
+def load_and_clean_data(file_name, use_cache=True, earlier=None):
+    """(cleaned df, total records, month name). With earlier, a glob pattern
+    of exports in DATA_DIR, df also gets a "Reported Earlier" column (see
+    reported_earlier)."""
     # Metadata for UI
-    total_records = len(df)
     month_name = os.path.splitext(file_name)[0].capitalize()
 
-    # Basic Normalization
+    df = read_cache(file_name) if use_cache else None
+    fingerprints = None
+    if df is None:
+        df = pd.read_csv(
+            os.path.join(DATA_DIR, file_name),
+            sep=";",
+            encoding="utf-8-sig"
+            )
+        df, issues = clean_data(df)
+        report_issues(file_name, issues)
+        # Near-duplicate groups need the whole export, so this is not part of clean_data
+        fingerprints = Fingerprints.from_frame(df)
+        df["Duplicate Of"] = fingerprints.duplicate_of()
+        if use_cache:
+            write_cache(file_name, df)
+    if earlier:
+        # Not cached with the frame: it changes whenever an earlier export is added
+        df["Reported Earlier"] = reported_earlier(file_name, df, earlier, fingerprints)
+
+    total_records = len(df)
+    return df, total_records, month_name
+
+def clean_data(df, row_offset=0):
+    """(cleaned df, issues) for a raw export or a chunk starting at row_offset."""
+    # Schema checks and canonical scores, labels, technique lists and dates
+    df, issues = validate(df, row_offset)
     df["Data Protection State"] = df["Data Protection State"].fillna("No Protection")
-    df["Techniques Used"] = df["Techniques Used"].fillna("Unknown")
-    df["Techniques Used"] = df["Techniques Used"].astype(str).str.split(",")
 
-    # Exploded dataframe for technique-specific analysis
-    df_exploded = df.explode("Techniques Used")
-    df_exploded["Techniques Used"] = df_exploded["Techniques Used"].str.strip()
+    # Display labels, derived once so graph functions do not re-clean per callback
+    df["Motivation"] = df["Root Cause (Why)"].fillna("Unknown")
+    df["Asset Label"] = df["Asset Type"].fillna("Unknown")
+    df["Exposure Label"] = df["Data exposure score"].astype(str).replace("-1", "Unknown")
+
+    # Day of occurrence for the trend section
+    df["Incident Date"] = df["Date of occurrence"].dt.normalize()
+
+    # Sophistication Logic
+    techniques = LabelMatrix(df["Techniques Used"])
+    df["Sophistication_Category"] = sophistication_signals(techniques)
+    df["Combination"] = combo_labels(techniques)
 
     # Sensitivity Labeling
-    df_exploded["Sensitivity_Label"] = df_exploded["Data Sensitivity score"].astype(str)
-    df_exploded.loc[df_exploded["Data Sensitivity score"] == -1, "Sensitivity_Label"] = "-1 (Score Unknown)"
+    df["Sensitivity_Label"] = df["Data Sensitivity score"].astype(str)
+    df.loc[df["Data Sensitivity score"] == -1, "Sensitivity_Label"] = "-1 (Score Unknown)"
+
+    # Technique-level analysis goes through the sparse incident x technique
+    # matrix (see IncidentStore), so no exploded copy of the frame is made
+    return df.astype({col: "category" for col in CATEGORICAL_COLUMNS}), issues
+
+def stream_aggregates(file_name, chunk_size=100_000):
+    # Cleans and explodes the export chunk by chunk and only keeps the running
+    # count cubes, so peak memory is bounded by chunk_size rather than file size
+    month_name = os.path.splitext(file_name)[0].capitalize()
+    reader = pd.read_csv(
+        os.path.join(DATA_DIR, file_name),
+        sep=";",
+        encoding="utf-8-sig",
+        chunksize=chunk_size,
+        )
+
+    mergers, issues, row_offset = {name: CubeMerger() for name in CUBES}, [], 0
+    for chunk in reader:
+        chunk, chunk_issues = clean_data(chunk, row_offset)
+        issues.append(chunk_issues)
+        row_offset += len(chunk)
+        for name, cube in build_cubes(chunk, LabelMatrix(chunk["Techniques Used"])).items():
+            mergers[name].add(cube)
+    if row_offset == 0:
+        raise ValueError(f"{file_name} contains no incidents")
+    report_issues(file_name, pd.concat(issues, ignore_index=True))
 
-    return df, df_exploded, total_records, month_name
+    cubes = {name: merger.flush().categorise() for name, merger in mergers.items()}
+    total_records = int(cubes["incidents"].cells["count"].sum())
+    return cubes, total_records, month_name
+
+# ==============================================================================
+# 2.1 PARQUET CACHE
+# ==============================================================================
+# The cleaned frame is written next to the export as Parquet, together with a
+# manifest of the source file's size, mtime and content hash. Later starts read
+# the Parquet file (memory-mapped) instead of re-parsing and re-cleaning the CSV.
+def file_hash(path):
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def cache_paths(file_name):
+    stem = os.path.join(CACHE_DIR, os.path.splitext(file_name)[0])
+    return stem + ".json", stem + ".parquet"
+
+def read_cache(file_name):
+    if pyarrow is None:
+        return None
+    manifest_path, df_path = cache_paths(file_name)
+    try:
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    source = os.path.join(DATA_DIR, file_name)
+    stat = os.stat(source)
+    if manifest.get("format") != CACHE_FORMAT or stat.st_size != manifest["size"]:
+        return None
+    # A touched but unchanged file only costs a re-hash, not a re-parse
+    if stat.st_mtime_ns != manifest["mtime_ns"]:
+        if file_hash(source) != manifest["hash"]:
+            return None
+        manifest["mtime_ns"] = stat.st_mtime_ns
+        write_json_atomic(manifest_path, manifest)
+
+    try:
+        df = pd.read_parquet(df_path, memory_map=True)
+    except (OSError, ValueError) as e:
+        warnings.warn(f"Ignoring unreadable Parquet cache for {file_name}: {e}")
+        return None
+    # Parquet hands list columns back as arrays
+    for col in MULTI_LABEL_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].map(list)
+    return df
+
+def write_cache(file_name, df):
+    if pyarrow is None:
+        return
+    manifest_path, df_path = cache_paths(file_name)
+    source = os.path.join(DATA_DIR, file_name)
+    stat = os.stat(source)
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        df.to_parquet(df_path + ".tmp")
+        os.replace(df_path + ".tmp", df_path)
+    except (OSError, ValueError, pyarrow.ArrowException) as e:
+        warnings.warn(f"Could not write Parquet cache for {file_name}: {e}")
+        return
+    # The manifest goes last so a half-written cache is never trusted
+    write_json_atomic(manifest_path, {
+        "format": CACHE_FORMAT, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "hash": file_hash(source),
+    })
+
+# ==============================================================================
+# 2.2 SEARCH INDEX
+# ==============================================================================
+# The full-text index is built from the cleaned frame on the first load of an
+# export and kept in data/.cache/<export>.search/, where later loads (and every
+# worker) memory-map it.
+def load_text_index(file_name, df):
+    path = os.path.splitext(os.path.join(CACHE_DIR, file_name))[0] + ".search"
+    source_path = os.path.join(path, "source.json")
+    source = {"format": CACHE_FORMAT, "version": dataset_version(file_name)}
+    try:
+        with open(source_path) as f:
+            if json.load(f) == source:
+                index = TextIndex.load(path)
+                if index is not None and index.n_rows == len(df):
+                    return index
+    except (OSError, ValueError):
+        pass
+
+    index = TextIndex.from_frame(df)
+    if index is None:
+        return None
+    try:
+        os.makedirs(path, exist_ok=True)
+        index.save(path)
+        write_json_atomic(source_path, source)
+    except OSError as e:
+        warnings.warn(f"Could not write the search index for {file_name}: {e}")
+    return index
+
+# ==============================================================================
+# 2.3 DUPLICATES ACROSS EXPORTS
+# ==============================================================================
+# The same breach often appears in several monthly exports. Each export's
+# dedup fingerprints (MinHash signatures, LSH band keys and shingles of its
+# texts) are kept in data/.cache/<export>.dedup/; an export loaded later is
+# matched against those of every export modified before it. Exports never
+# loaded get theirs from their text columns alone.
+def earlier_exports(file_name, pattern):
+    """Exports in DATA_DIR matching pattern that were last modified before file_name, oldest first."""
+    mtime = os.stat(os.path.join(DATA_DIR, file_name)).st_mtime_ns
+    exports = []
+    for path in glob.glob(os.path.join(DATA_DIR, pattern)):
+        name = os.path.basename(path)
+        try:
+            if name != file_name and os.stat(path).st_mtime_ns < mtime:
+                exports.append((os.stat(path).st_mtime_ns, name))
+        except OSError:  # removed since the glob
+            continue
+    return [name for _, name in sorted(exports)]
+
+def export_fingerprints(file_name, df=None, fingerprints=None):
+    """Fingerprints of an export from data/.cache/<export>.dedup/, or built
+    (from fingerprints, df or the export's text columns) and saved there."""
+    path = os.path.splitext(os.path.join(CACHE_DIR, file_name))[0] + ".dedup"
+    source_path = os.path.join(path, "source.json")
+    source = {"format": CACHE_FORMAT, "version": dataset_version(file_name)}
+    if fingerprints is None:
+        try:
+            with open(source_path) as f:
+                if json.load(f) == source:
+                    loaded = Fingerprints.load(path)
+                    if df is None or len(loaded.codes) == len(df):
+                        return loaded
+        except (OSError, ValueError):
+            pass
+        if df is None:
+            df = pd.read_csv(os.path.join(DATA_DIR, file_name), sep=";", encoding="utf-8-sig",
+                             usecols=lambda col: col in TEXT_COLUMNS)
+        fingerprints = Fingerprints.from_frame(df)
+    try:
+        os.makedirs(path, exist_ok=True)
+        fingerprints.save(path)
+        write_json_atomic(source_path, source)
+    except OSError as e:
+        warnings.warn(f"Could not write the dedup fingerprints for {file_name}: {e}")
+    return fingerprints
+
+def reported_earlier(file_name, df, pattern, fingerprints=None):
+    """Per incident: whether its near-duplicate group (df["Duplicate Of"]) has
+    a report in an earlier export matching pattern."""
+    own = export_fingerprints(file_name, df, fingerprints)
+    seen = np.zeros(len(own.signatures), dtype=bool)
+    for other in earlier_exports(file_name, pattern):
+        try:
+            seen |= own.matches(export_fingerprints(other))
+        except (OSError, ValueError) as e:
+            warnings.warn(f"Skipping {other} when matching duplicates across exports: {e}")
+    first = df["Duplicate Of"].to_numpy()
+    group_seen = np.zeros(len(df), dtype=bool)
+    group_seen[first[seen[own.codes]]] = True
+    return group_seen[first]
+
+def write_json_atomic(path, data):
+    with open(path + ".tmp", "w") as f:
+        json.dump(data, f)
+    os.replace(path + ".tmp", path)
+
+def issues_path(file_name):
+    return os.path.join(CACHE_DIR, os.path.splitext(file_name)[0] + ".issues.csv")
+
+def report_issues(file_name, issues):
+    # Row numbers count data rows from 0, header excluded
+    path = issues_path(file_name)
+    if issues.empty:
+        if os.path.exists(path):
+            os.remove(path)
+        return
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        issues.to_csv(path, index=False)
+    except OSError as e:
+        warnings.warn(f"Could not write the issues report for {file_name}: {e}")
+        path = None
+    warnings.warn(f"{file_name}: {issues['row'].nunique():,} rows had invalid values, "
+                  f"replaced by unknown ({summarise(issues)})" + (f"; details in {path}" if path else ""))
 
 # ==============================================================================
 # 3. HELPER FUNCTIONS
 # ==============================================================================
+def dataset_version(file_name):
+    # Changes whenever the export is replaced or rewritten in place
+    stat = os.stat(os.path.join(DATA_DIR, file_name))
+    return f"{file_name}:{stat.st_size}:{stat.st_mtime_ns}"
+
+# get_sophistication_signal and format_combo work on one incident at a time and
+# are kept as the reference behaviour; clean_data uses the vectorised versions
+# below, which must give the same labels.
 def get_sophistication_signal(val):
     if pd.isna(val) is True or val is None:
         return "Unknown Technique"
@@ -62,3 +337,38 @@ def format_combo(val):
     else:
         techs = sorted([t.strip() for t in str(val).split(",") if t.strip()])
     return " + ".join(techs) if techs else "Unknown"
+
+def matrix_row_sums(matrix, columns=None):
+    if columns is not None:
+        matrix = matrix[:, columns]
+    return np.asarray(matrix.sum(axis=1)).ravel()
+
+def sophistication_signals(techniques):
+    # Vectorised get_sophistication_signal over the technique LabelMatrix
+    tokens = matrix_row_sums(techniques.matrix)
+    non_empty = tokens - matrix_row_sums(techniques.matrix, techniques.columns([""]))
+    unknown_columns = [i for i, t in enumerate(techniques.labels) if t.lower() in UNKNOWN_TECHNIQUE_TEXT]
+    # A lone "Unknown"/"none"/"nan" entry counts as no technique at all
+    unknown = (tokens == 1) & (matrix_row_sums(techniques.matrix, unknown_columns) == 1)
+
+    level = np.select([unknown | (non_empty == 0), non_empty == 1, non_empty <= 3], [0, 1, 2], default=3)
+    return pd.Categorical.from_codes(level, SOPHISTICATION_LEVELS)
+
+def combo_labels(techniques):
+    # Vectorised format_combo: an incident's combination is identified by its
+    # sorted technique codes (repeats included), so each distinct combination
+    # is labelled once and incidents only carry an integer id
+    rows, codes, repeats = techniques.entries()
+    keep = ~np.isin(codes, techniques.columns([""]))
+    rows, codes = np.repeat(rows[keep], repeats[keep]), np.repeat(codes[keep], repeats[keep])
+
+    # CSR keeps each row's column indices sorted, which is the technique name order
+    lengths = np.bincount(rows, minlength=len(techniques))
+    position = np.arange(len(rows)) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    padded = np.full((len(techniques), max(1, lengths.max(initial=0))), -1, dtype=np.int32)
+    padded[rows, position] = codes
+    combos, combo_ids = np.unique(padded, axis=0, return_inverse=True)
+
+    labels = [" + ".join(techniques.labels[c] for c in combo if c >= 0) or "Unknown" for combo in combos]
+    label_codes, label_values = pd.factorize(pd.Index(labels))
+    return pd.Categorical.from_codes(label_codes[combo_ids.ravel()], label_values)
@@ -0,0 +1,257 @@
+import os
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from scipy.sparse.csgraph import connected_components
+
+from components.text_index import TEXT_COLUMNS, word_codes
+
+# ==============================================================================
+# NEAR-DUPLICATE INCIDENTS
+# ==============================================================================
+# The same breach is often reported several times (by different sources, with
+# slightly different wording). Each incident's title + description is cut into
+# overlapping word pairs (shingles) and summarised by a MinHash signature;
+# signatures agree in about the same share of positions as the shingle sets
+# overlap (Jaccard similarity). LSH banding then only considers incidents that
+# share a whole band of their signature, which keeps the work roughly linear,
+# and those candidate pairs are confirmed on their exact Jaccard similarity.
+SHINGLE_WORDS = 2
+NUM_PERM = 64
+# 16 bands of 4 rows: pairs at 0.7 similarity share a band 99% of the time
+BANDS = 16
+# Jaccard similarity needed to count as a duplicate; one changed word in a
+# 20-word description still scores above it
+SIMILARITY = 0.7
+# Candidates whose signatures agree less than this are dropped before the
+# exact check; far enough below SIMILARITY that estimate noise loses no pairs
+CANDIDATE_SIMILARITY = 0.5
+SEED = 20240601
+# Shingles hashed per block; NUM_PERM * 8 bytes each, so a block stays in cache
+BLOCK = 20_000
+# Arrays of Fingerprints, as saved; in the order of its constructor arguments
+FILES = ("codes", "text_of", "hashes", "signatures", "bands")
+
+
+def shingles(texts):
+    """(text index, 64-bit shingle hash) arrays, sorted by text.
+
+    Texts shorter than SHINGLE_WORDS give a single shingle of all their words;
+    texts without words give none.
+    """
+    lengths, word_ids, words = word_codes(texts)
+    # Shingles hash the words themselves rather than their ids, which only
+    # number this call's words, so hashes compare across exports. The padding
+    # id -1 picks the 0 appended at the end.
+    word_hashes = np.append(pd.util.hash_array(np.asarray(words, dtype=object)), np.uint64(0))
+    # Each text's words are followed by SHINGLE_WORDS - 1 padding ids (-1), so
+    # a window never runs into the next text
+    pad = SHINGLE_WORDS - 1
+    ends = np.cumsum(lengths + pad)
+    starts = ends - lengths - pad
+    padded = np.full(ends[-1] if len(ends) else 0, -1, dtype=np.int64)
+    padded[expand(starts, lengths)[0]] = word_ids
+
+    position = np.arange(len(padded) - pad)
+    full = padded[position + pad] >= 0
+    short_start = np.zeros(len(position), dtype=bool)
+    short_start[starts[(lengths > 0) & (lengths < SHINGLE_WORDS)]] = True
+    keep = position[(padded[position] >= 0) & (full | short_start)]
+
+    hashes = np.zeros(len(keep), dtype=np.uint64)
+    for offset in range(SHINGLE_WORDS):
+        word = word_hashes[padded[keep + offset]]
+        hashes = (hashes ^ word) * np.uint64(0x100000001B3)  # FNV-style mixing
+    text_of = np.repeat(np.arange(len(texts)), lengths + pad)
+    return text_of[keep], hashes
+
+
+def minhash(text_of, hashes, n_texts):
+    """(n_texts x NUM_PERM) uint32 signatures; texts without shingles keep the maximum."""
+    rng = np.random.default_rng(SEED)
+    a = rng.integers(1, 2**63, NUM_PERM, dtype=np.uint64) | np.uint64(1)
+    b = rng.integers(0, 2**63, NUM_PERM, dtype=np.uint64)
+    signatures = np.full((n_texts, NUM_PERM), np.iinfo(np.uint32).max, dtype=np.uint32)
+    texts, first = np.unique(text_of, return_index=True)
+    ends = np.append(first[1:], len(hashes))
+    # Blocks of whole texts, so every text's minimum comes from one block
+    cuts = np.append(np.flatnonzero(np.diff(first // BLOCK, prepend=-1) != 0), len(texts))
+    for t0, t1 in zip(cuts[:-1], cuts[1:]):
+        lo, hi = first[t0], ends[t1 - 1]
+        # Multiply-shift hashing: the high 32 bits of a * x + b (mod 2**64)
+        values = np.multiply(a[:, None], hashes[None, lo:hi])
+        values += b[:, None]
+        values >>= np.uint64(32)
+        signatures[texts[t0:t1]] = np.minimum.reduceat(values, first[t0:t1] - lo, axis=1).T.astype(np.uint32)
+    return signatures
+
+
+def band_keys(signatures):
+    """(n_texts x BANDS) uint64 key of each band of the signatures; texts
+    sharing a band's key are in the same LSH bucket for that band."""
+    rows_per_band = NUM_PERM // BANDS
+    keys = np.zeros((len(signatures), BANDS), dtype=np.uint64)
+    for band in range(BANDS):
+        for column in signatures[:, band * rows_per_band:(band + 1) * rows_per_band].T:
+            keys[:, band] = (keys[:, band] ^ column.astype(np.uint64)) * np.uint64(0x100000001B3)
+    return keys
+
+
+def candidate_pairs(signatures, bands, candidates):
+    """Distinct pairs (i, j) of texts that share a band and whose signatures
+    agree on at least CANDIDATE_SIMILARITY of their positions."""
+    edges = []
+    for band in range(BANDS):
+        keys = bands[candidates, band]
+        order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[order]
+        new_bucket = np.ones(len(order), dtype=bool)
+        new_bucket[1:] = sorted_keys[1:] != sorted_keys[:-1]
+        # Every member of a bucket is compared with the bucket's first text only
+        first = order[np.flatnonzero(new_bucket)[np.cumsum(new_bucket) - 1]]
+        members = first != order
+        i, j = candidates[order[members]], candidates[first[members]]
+        agree = (signatures[i] == signatures[j]).mean(axis=1) >= CANDIDATE_SIMILARITY
+        edges.append(i[agree] * len(signatures) + j[agree])
+    edges = np.unique(np.concatenate(edges))
+    return edges // len(signatures), edges % len(signatures)
+
+
+def expand(starts, lengths):
+    """Concatenated ranges starts[k]:starts[k] + lengths[k], with the range index of each element."""
+    owner = np.repeat(np.arange(len(starts)), lengths)
+    return np.repeat(starts, lengths) + np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths), owner
+
+
+def shingle_sets(texts, starts, sizes, hashes):
+    """(pair index, shingle) with each text's repeated shingles dropped, and the set sizes."""
+    idx, pair = expand(starts[texts], sizes[texts])
+    shingle = hashes[idx]
+    order = np.lexsort((shingle, pair))
+    pair, shingle = pair[order], shingle[order]
+    distinct = np.ones(len(pair), dtype=bool)
+    distinct[1:] = (pair[1:] != pair[:-1]) | (shingle[1:] != shingle[:-1])
+    pair, shingle = pair[distinct], shingle[distinct]
+    return pair, shingle, np.bincount(pair, minlength=len(texts))
+
+
+def jaccard(i, j, a, b):
+    """Exact Jaccard similarity of the shingle sets of texts a[i[k]] and b[j[k]]
+    (Fingerprints; the same one for pairs within an export)."""
+    similarity = np.empty(len(i))
+    # Pairs are checked in blocks to bound the gathered shingles
+    step = max(BLOCK // max(int(a.sizes.mean()) if len(a.sizes) else 0, 1), 1)
+    for lo in range(0, len(i), step):
+        pair_a, shingle_a, size_a = shingle_sets(i[lo:lo + step], a.starts, a.sizes, a.hashes)
+        pair_b, shingle_b, size_b = shingle_sets(j[lo:lo + step], b.starts, b.sizes, b.hashes)
+        pair = np.concatenate([pair_a, pair_b])
+        shingle = np.concatenate([shingle_a, shingle_b])
+        order = np.lexsort((shingle, pair))
+        pair, shingle = pair[order], shingle[order]
+        # Each set holds a shingle once, so a repeat within a pair is a shared shingle
+        shared = (pair[1:] == pair[:-1]) & (shingle[1:] == shingle[:-1])
+        common = np.bincount(pair[1:][shared], minlength=len(size_a))
+        similarity[lo:lo + step] = common / np.maximum(size_a + size_b - common, 1)
+    return similarity
+
+
+class Fingerprints:
+    """Shingles, MinHash signatures and LSH band keys of an export's distinct
+    texts, plus the text of each incident (codes). Groups within the export
+    come from duplicate_of(); saved per export (see data_handler), they also
+    let a later export find the incidents this one already reported."""
+
+    def __init__(self, codes, text_of, hashes, signatures, bands):
+        self.codes = codes
+        self.text_of = text_of
+        self.hashes = hashes
+        self.signatures = signatures
+        self.bands = bands
+        self.sizes = np.bincount(text_of, minlength=len(signatures))
+        self.starts = np.cumsum(self.sizes) - self.sizes
+
+    @classmethod
+    def from_frame(cls, df, columns=TEXT_COLUMNS):
+        """Fingerprints of title + description (the columns of df that exist)."""
+        columns = [col for col in columns if col in df.columns]
+        if columns:
+            text = df[columns[0]].fillna("").astype(str)
+            for col in columns[1:]:
+                text = text + " " + df[col].fillna("").astype(str)
+        else:
+            text = pd.Series("", index=df.index)
+        # Identical texts share one signature, so only distinct texts are hashed
+        codes, texts = pd.factorize(text)
+        text_of, hashes = shingles(texts)
+        signatures = minhash(text_of, hashes, len(texts))
+        return cls(codes, text_of, hashes, signatures, band_keys(signatures))
+
+    @property
+    def has_words(self):
+        """Per text: whether it has shingles; texts without words are never matched."""
+        return self.sizes > 0
+
+    def duplicate_of(self):
+        """For every incident, the position of the first incident in its group of
+        near-duplicates (itself if it has none). Incidents without text are
+        never grouped."""
+        n_rows, n_texts = len(self.codes), len(self.signatures)
+        if not n_rows:
+            return np.arange(n_rows)
+        i, j = candidate_pairs(self.signatures, self.bands, np.flatnonzero(self.has_words))
+        similar = jaccard(i, j, self, self) >= SIMILARITY
+        i, j = i[similar], j[similar]
+
+        graph = sp.coo_matrix((np.ones(len(i), dtype=np.int8), (i, j)), shape=(n_texts, n_texts))
+        _, group = connected_components(graph, directed=False)
+        # Incidents without any words stay on their own
+        row_group = np.where(self.has_words[self.codes], group[self.codes], n_texts + np.arange(n_rows))
+
+        _, labels = np.unique(row_group, return_inverse=True)
+        first_row = np.full(labels.max() + 1, n_rows, dtype=np.int64)
+        np.minimum.at(first_row, labels, np.arange(n_rows))
+        return first_row[labels]
+
+    def matches(self, other):
+        """Per text of this export: whether it is a near-duplicate of some text
+        of other (another export's Fingerprints). As within an export, each
+        text is compared with the first of other's texts in the buckets it shares."""
+        ours, theirs = np.flatnonzero(self.has_words), np.flatnonzero(other.has_words)
+        found = np.zeros(len(self.signatures), dtype=bool)
+        if not len(ours) or not len(theirs):
+            return found
+        edges = []
+        for band in range(BANDS):
+            keys = np.asarray(other.bands[theirs, band])
+            order = np.argsort(keys, kind="stable")
+            sorted_keys = keys[order]
+            # searchsorted finds the first of other's texts in the bucket
+            at = np.minimum(np.searchsorted(sorted_keys, self.bands[ours, band]), len(order) - 1)
+            hit = sorted_keys[at] == self.bands[ours, band]
+            i, j = ours[hit], theirs[order[at[hit]]]
+            agree = (self.signatures[i] == other.signatures[j]).mean(axis=1) >= CANDIDATE_SIMILARITY
+            edges.append(i[agree] * len(other.signatures) + j[agree])
+        edges = np.unique(np.concatenate(edges))
+        i, j = edges // len(other.signatures), edges % len(other.signatures)
+        found[i[jaccard(i, j, self, other) >= SIMILARITY]] = True
+        return found
+
+    def save(self, path):
+        """Writes the arrays into the existing directory path as .npy files."""
+        for name in FILES:
+            tmp = os.path.join(path, f"{name}.tmp")
+            with open(tmp, "wb") as f:
+                np.save(f, getattr(self, name))
+            # Replaced rather than overwritten, so processes mapping the old file keep it intact
+            os.replace(tmp, os.path.join(path, f"{name}.npy"))
+
+    @classmethod
+    def load(cls, path):
+        """Fingerprints over the memory-mapped arrays written by save()."""
+        return cls(*(np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r") for name in FILES))
+
+
+def duplicate_of(df, columns=TEXT_COLUMNS):
+    """Fingerprints.from_frame(df, columns).duplicate_of()"""
+    return Fingerprints.from_frame(df, columns).duplicate_of()
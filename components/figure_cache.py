@@ -0,0 +1,117 @@
+import threading
+from collections import OrderedDict
+from functools import wraps
+
+import numpy as np
+
+# ==============================================================================
+# FIGURE CACHE
+# ==============================================================================
+# Entry sizes are estimated from the figure's data arrays rather than by
+# serialising it, which Dash does again anyway when it sends the figure. The
+# constants fit the dashboard's figures to within about 20%: the layout
+# (mostly the template) is about 7 KB, each trace adds its hover template and
+# styling, and each data value about 12 bytes of JSON.
+LAYOUT_BYTES = 7_000
+TRACE_BYTES = 500
+VALUE_BYTES = 12
+DATA_ARRAYS = ("x", "y", "z", "r", "theta", "values", "labels", "text", "hovertext", "customdata", "ids")
+
+
+def data_values(value):
+    """Number of scalars in a trace property (nested lists count in full)."""
+    if value is None or isinstance(value, str):
+        return 0
+    if isinstance(value, np.ndarray):
+        return value.size
+    return sum(data_values(item) if isinstance(item, (list, tuple, np.ndarray)) else 1 for item in value)
+
+
+def estimated_size(fig):
+    """Approximate JSON size of a figure in bytes."""
+    size = LAYOUT_BYTES
+    for trace in fig.data:
+        values = sum(data_values(getattr(trace, name, None)) for name in DATA_ARRAYS)
+        size += TRACE_BYTES + VALUE_BYTES * values
+    return size
+
+
+def normalise_filter(value):
+    """Dropdown selections are order-insensitive and None means the same as []."""
+    if value is None:
+        return ()
+    if isinstance(value, (list, tuple, set)):
+        return tuple(sorted(set(value), key=str))
+    return value
+
+
+class FigureCache:
+    """LRU cache of built figures, bounded by entry count and estimated size.
+
+    Keys combine the builder, the normalised filter values and the dataset
+    version. When `version()` changes every entry is dropped.
+    """
+
+    def __init__(self, version, max_entries=256, max_bytes=64 * 1024 * 1024):
+        self.version = version
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._version = None
+        self._lock = threading.Lock()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                "entries": len(self._entries), "bytes": self._bytes,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _get(self, key, version):
+        with self._lock:
+            if version != self._version:
+                self._entries.clear()
+                self._bytes = 0
+                self._version = version
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key][0]
+            self.misses += 1
+            return None
+
+    def _put(self, key, version, fig):
+        size = estimated_size(fig)
+        with self._lock:
+            # A reload may have happened while this figure was being built
+            if version != self._version or size > self.max_bytes or key in self._entries:
+                return
+            self._entries[key] = (fig, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def cached(self, build):
+        name = f"{build.__module__}.{build.__qualname__}"
+
+        @wraps(build)
+        def wrapper(*filters):
+            version = self.version()
+            key = (name,) + tuple(normalise_filter(value) for value in filters)
+            fig = self._get(key, version)
+            if fig is None:
+                fig = build(*filters)
+                self._put(key, version, fig)
+            return fig
+        return wrapper
@@ -0,0 +1,55 @@
+from dash import Patch
+
+# ==============================================================================
+# LEAN FIGURE UPDATES
+# ==============================================================================
+# Instead of a whole figure, a filter change can send only the traces' data
+# arrays as a dash Patch. Styling (colours, hover templates) is copied from the
+# matching trace of the unfiltered figure, and the layout and template already
+# on the client are left alone.
+DATA_KEYS = {"x", "y", "z", "r", "theta", "customdata", "text"}
+
+
+def group_series(table, color=None, **fields):
+    """Data arrays per trace, keyed by trace name as plotly express names them.
+
+    fields map a trace attribute to a column, or to a list of columns for
+    2-D attributes such as customdata.
+    """
+    groups = table.groupby(color, observed=True, sort=False) if color else [("", table)]
+    series = {}
+    for name, rows in groups:
+        series[str(name)] = {
+            attr: rows[cols].to_numpy().tolist() if isinstance(cols, list) else rows[cols].tolist()
+            for attr, cols in fields.items()
+        }
+    return series
+
+
+def patched_traces(base, series):
+    templates = [
+        {k: v for k, v in trace.to_plotly_json().items() if k not in DATA_KEYS}
+        for trace in base.data
+    ]
+    # Single-trace figures (heatmap, top combinations) match regardless of name
+    if len(templates) == 1 and len(series) == 1:
+        return [{**templates[0], **next(iter(series.values()))}]
+    # Keep the unfiltered trace order so legends and bar offsets do not move
+    return [{**t, **series[t.get("name", "")]} for t in templates if t.get("name", "") in series]
+
+
+def figure_patch(base, series, layout=None):
+    """Patch turning the client's copy of `base` into the figure for `series`.
+
+    layout holds dotted paths ("xaxis.categoryarray") for the few layout
+    values that depend on the filters.
+    """
+    patch = Patch()
+    patch["data"] = patched_traces(base, series)
+    for path, value in (layout or {}).items():
+        target = patch["layout"]
+        *parents, key = path.split(".")
+        for parent in parents:
+            target = target[parent]
+        target[key] = value
+    return patch
@@ -1,18 +1,18 @@
 import plotly.express as px
 import plotly.graph_objects as go
-import networkx as nx
-import numpy as np
+
+from components.figure_patch import group_series
 
 # --- 6.1 Data Filtering: Main Viz ---
-def create_main_bar(f_df_exp, df_exploded,selected_ta, selected_tech, ACCESSIBLE_PALETTE):
+def main_bar_counts(store, selected_ta, selected_tech):
+    return store.counts(
+        {"Threat Actor": selected_ta, "Techniques Used": selected_tech},
+        ["Threat Actor", "Techniques Used"], cube="techniques"
+    )
 
-    f_df_exp = df_exploded.copy()
-    if selected_ta:
-        f_df_exp = f_df_exp[f_df_exp["Threat Actor"].isin(selected_ta)]
-    if selected_tech:
-        f_df_exp = f_df_exp[f_df_exp["Techniques Used"].isin(selected_tech)]
+def create_main_bar(store, selected_ta, selected_tech, ACCESSIBLE_PALETTE):
 
-    ta_tech_counts = f_df_exp.groupby(["Threat Actor", "Techniques Used"]).size().reset_index(name="Count")
+    ta_tech_counts = main_bar_counts(store, selected_ta, selected_tech)
     fig = px.bar(
         ta_tech_counts, x="Threat Actor", y="Count", color="Techniques Used",
         barmode="group", title="Technique Usage by Threat Actor",
@@ -21,53 +21,52 @@ def create_main_bar(f_df_exp, df_exploded,selected_ta, selected_tech, ACCESSIBLE
     fig.update_yaxes(type="log", title="Incident Count (log scale)", dtick=1)
     return fig
 
-def create_network_graph(df_exploded, ACCESSIBLE_PALETTE):
+def main_bar_series(store, selected_ta, selected_tech):
+    counts = main_bar_counts(store, selected_ta, selected_tech)
+    return group_series(counts, "Techniques Used", x="Threat Actor", y="Count"), {}
+
+def node_positions(labels, x):
+    # Evenly spaced column of nodes; a single node sits in the middle
+    if len(labels) == 1:
+        return {labels[0]: (x, 0.5)}
+    return {label: (x, i / (len(labels) - 1)) for i, label in enumerate(labels)}
+
+def create_network_graph(store, ACCESSIBLE_PALETTE, top_n=10):
 
     # --- 6.2 Network Graph ---
-    top_pairs = df_exploded.groupby(['Threat Actor', 'Techniques Used']).size().nlargest(10).reset_index(name='counts')
+    top_pairs = (store.counts({}, ['Threat Actor', 'Techniques Used'], cube='techniques', name='counts')
+                 .nlargest(top_n, 'counts').reset_index(drop=True)
+                 .astype({'Threat Actor': str, 'Techniques Used': str}))
     
     idx = (top_pairs["Threat Actor"] == "Unknown")
     top_pairs.loc[idx, "Threat Actor"] = "Unknown (Threat Actor)"
     idx = (top_pairs["Techniques Used"] == "Unknown")
     top_pairs.loc[idx, "Techniques Used"] = "Unknown (Technique Used)"
-    
-    threat_actor_unique = set(top_pairs["Threat Actor"])
-    techniques_unique = set(top_pairs["Techniques Used"])
+    top_pairs = top_pairs[top_pairs["counts"] > 0]
 
-    G = nx.Graph()
-    for ta in threat_actor_unique:
-        for teq in techniques_unique:
-            combination_count = top_pairs[(top_pairs["Threat Actor"] == ta) & 
-                                        (top_pairs["Techniques Used"] == teq)]["counts"]
-            combination_count = combination_count.item() if len(combination_count) > 0 else 0
-            G.add_node(ta, type='Threat Actor')
-            G.add_node(teq, type='Technique Used', count=combination_count)
-            G.add_edge(ta, teq, weight=combination_count)
+    ta_list = sorted(top_pairs["Threat Actor"].unique())
+    teq_list = sorted(top_pairs["Techniques Used"].unique())
+    pos = {**node_positions(ta_list, 0), **node_positions(teq_list, 1)}
 
-    pos = {}
-    ta_list = sorted(list(threat_actor_unique))
-    teq_list = sorted(list(techniques_unique))
+    # All edges go into one trace as None-separated segments
+    edge_x, edge_y, mid_x, mid_y = [], [], [], []
+    for ta, teq in zip(top_pairs["Threat Actor"], top_pairs["Techniques Used"]):
+        (x0, y0), (x1, y1) = pos[ta], pos[teq]
+        edge_x += [x0, x1, None]
+        edge_y += [y0, y1, None]
+        mid_x.append((x0 + x1) / 2)
+        mid_y.append((y0 + y1) / 2)
 
-    for i, ta in enumerate(ta_list):
-        pos[ta] = np.array([0, i / (max(1, len(ta_list)-1)) if len(ta_list) > 1 else 0.5])
-    for i, teq in enumerate(teq_list):
-        pos[teq] = np.array([1, i / (max(1, len(teq_list)-1)) if len(teq_list) > 1 else 0.5])
+    edge_trace = go.Scatter(x=edge_x, y=edge_y,
+                            line=dict(width=5, color='rgba(200, 210, 230, 0.5)'),
+                            hoverinfo='none', mode='lines')
 
-    edge_traces, edge_annotations = [], []
-    for edge in G.edges(data=True):
-        u, v = edge[0], edge[1]
-        x0, y0 = pos[u]
-        x1, y1 = pos[v]
-        weight = edge[2]['weight']
-        if weight > 0:
-            edge_traces.append(go.Scatter(x=[x0, x1, None], y=[y0, y1, None],
-                               line=dict(width=5, color='rgba(200, 210, 230, 0.5)'),
-                               hoverinfo='none', mode='lines'))
-            edge_annotations.append(dict(x=(x0 + x1) / 2, y=(y0 + y1) / 2,
-                                    text=f"<b>{weight}</b>", showarrow=False,
-                                    font=dict(size=14, color="black"),
-                                    bgcolor=ACCESSIBLE_PALETTE[5], bordercolor="white",
-                                    borderwidth=1, borderpad=4, opacity=0.9))
+    weight_trace = go.Scatter(x=mid_x, y=mid_y, mode='markers+text',
+                              text=[f"<b>{w}</b>" for w in top_pairs["counts"]],
+                              textfont=dict(size=14, color="black"),
+                              marker=dict(symbol='square', size=30, color=ACCESSIBLE_PALETTE[5],
+                                          opacity=0.9, line=dict(width=1, color='white')),
+                              hoverinfo='none')
 
     actor_trace = go.Scatter(x=[pos[ta][0] for ta in ta_list], y=[pos[ta][1] for ta in ta_list],
                              mode='markers+text', text=ta_list, textposition="middle left",
@@ -81,8 +80,8 @@ def create_network_graph(df_exploded, ACCESSIBLE_PALETTE):
                             marker=dict(size=30, color=ACCESSIBLE_PALETTE[2], line=dict(width=2, color='black')),
                             hoverinfo='none')
 
-    fig_network = go.Figure(data=edge_traces + [actor_trace, tech_trace],
-                            layout=go.Layout(annotations=edge_annotations,
+    fig_network = go.Figure(data=[edge_trace, weight_trace, actor_trace, tech_trace],
+                            layout=go.Layout(
                             xaxis=dict(showgrid=False, zeroline=False, showticklabels=False, range=[-0.8, 1.8]),
                             yaxis=dict(showgrid=False, zeroline=False, showticklabels=False, range=[-0.1, 1.1]),
                             margin=dict(l=10, r=10, t=10, b=10), template="plotly_white", height=600,
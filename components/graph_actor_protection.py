@@ -1,13 +1,17 @@
 import plotly.express as px
-def actor_protection(df,s4_ta, s4_prot):
-    f_df_s4 = df.copy()
-    if s4_ta:
-        f_df_s4 = f_df_s4[f_df_s4["Threat Actor"].isin(s4_ta)]
-    if s4_prot:
-        f_df_s4 = f_df_s4[f_df_s4["Data Protection State"].isin(s4_prot)]
-    
-    ap_counts = f_df_s4.groupby(["Threat Actor", "Data Protection State"]).size().reset_index(name="Count")
-    ap_counts['Percentage'] = ap_counts.groupby('Threat Actor')['Count'].transform(lambda x: (x / x.sum()) * 100)
+
+from components.figure_patch import group_series
+
+def actor_protection_counts(store, s4_ta, s4_prot):
+    ap_counts = store.counts(
+        {"Threat Actor": s4_ta, "Data Protection State": s4_prot},
+        ["Threat Actor", "Data Protection State"]
+    )
+    ap_counts['Percentage'] = ap_counts.groupby('Threat Actor', observed=True)['Count'].transform(lambda x: (x / x.sum()) * 100)
+    return ap_counts
+
+def actor_protection(store, s4_ta, s4_prot):
+    ap_counts = actor_protection_counts(store, s4_ta, s4_prot)
     
     fig_actor_protection = px.bar(
         ap_counts, x="Threat Actor", y="Count", color="Data Protection State",
@@ -18,3 +22,7 @@ def actor_protection(df,s4_ta, s4_prot):
     fig_actor_protection.update_traces(hovertemplate="<b>%{x}</b><br>Protection State = %{fullData.name}<br>Count=%{y}<br>Percentage=%{customdata[0]:.1f}%<extra></extra>")
     fig_actor_protection.update_yaxes(type="log", title="Incident Count (log scale)", dtick=1)
     return fig_actor_protection
+
+def actor_protection_series(store, s4_ta, s4_prot):
+    ap_counts = actor_protection_counts(store, s4_ta, s4_prot)
+    return group_series(ap_counts, "Data Protection State", x="Threat Actor", y="Count", customdata=["Percentage"]), {}
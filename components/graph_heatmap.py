@@ -1,13 +1,15 @@
 import plotly.express as px
 
-def heatmap(df, selected_ta):
-    heatmap_df = df.copy()
-    if selected_ta:
-        heatmap_df = heatmap_df[heatmap_df["Threat Actor"].isin(selected_ta)]
-    heatmap_df["Data Sensitivity score"] = heatmap_df["Data Sensitivity score"].fillna(-1)
+def heatmap_pivot(store, selected_ta):
+    heatmap_counts = store.counts({"Threat Actor": selected_ta}, ["Data Protection State", "Data Sensitivity score"])
 
-    pivot = heatmap_df.pivot_table(index='Data Protection State', columns='Data Sensitivity score', aggfunc='size', fill_value=0)
+    pivot = heatmap_counts.pivot_table(index='Data Protection State', columns='Data Sensitivity score', values='Count',
+                                       aggfunc='sum', fill_value=0, observed=True)
     x_labels = [f"{int(c)} (score unknown)" if c == -1 else str(int(c)) for c in pivot.columns]
+    return pivot, x_labels
+
+def heatmap(store, selected_ta):
+    pivot, x_labels = heatmap_pivot(store, selected_ta)
 
     fig_heatmap = px.imshow(
         pivot, text_auto=True, aspect="auto", x=x_labels, y=pivot.index,
@@ -15,3 +17,7 @@ def heatmap(df, selected_ta):
         color_continuous_scale="algae"
     )
     return fig_heatmap
+
+def heatmap_series(store, selected_ta):
+    pivot, x_labels = heatmap_pivot(store, selected_ta)
+    return {"": {"z": pivot.to_numpy().tolist(), "x": x_labels, "y": pivot.index.tolist()}}, {}
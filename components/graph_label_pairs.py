@@ -0,0 +1,112 @@
+import numpy as np
+import plotly.express as px
+import plotly.graph_objects as go
+
+from components.multi_label import lift
+
+# Multi-label columns the co-occurrence section can show
+PAIR_DIMENSIONS = {
+    "Techniques Used": "Techniques",
+    "LINDDUN categories": "LINDDUN categories",
+    "Jurisdiction": "Jurisdictions",
+}
+PAIR_METRICS = {"count": "Incidents", "lift": "Lift"}
+# Most frequent labels shown on the heatmap axes, and considered for the network
+HEATMAP_TOP_N = 20
+NETWORK_LABELS = 100
+# Pairs seen in fewer incidents get no lift; for rare pairs it is mostly noise
+MIN_PAIR_SUPPORT = 5
+
+def message_figure(text):
+    fig = go.Figure(layout=go.Layout(
+        xaxis=dict(visible=False), yaxis=dict(visible=False), template="plotly_white",
+    ))
+    fig.add_annotation(text=text, showarrow=False, font=dict(size=16))
+    return fig
+
+def unavailable(col):
+    return message_figure(f"This export has no {PAIR_DIMENSIONS[col]} column, or is streamed in chunks.")
+
+def label_pairs(store, col, selected_ta, top_n=None):
+    if not store.has_labels(col):
+        return None
+    return store.label_pairs(col, {"Threat Actor": selected_ta}, top_n=top_n)
+
+def label_heatmap(store, col, metric, selected_ta):
+    col = col or "Techniques Used"
+    found = label_pairs(store, col, selected_ta, top_n=HEATMAP_TOP_N)
+    if found is None:
+        return unavailable(col)
+    pairs, labels, n_incidents = found
+    if not labels:
+        return message_figure("No incidents with these labels.")
+
+    name = PAIR_DIMENSIONS[col]
+    if metric == "lift":
+        z = lift(pairs, n_incidents)
+        z[pairs < MIN_PAIR_SUPPORT] = np.nan
+        fig = px.imshow(z, x=labels, y=labels, text_auto=".2f", aspect="auto",
+                        labels=dict(x=name, y=name, color="Lift"),
+                        color_continuous_scale="RdBu_r", color_continuous_midpoint=1)
+    else:
+        fig = px.imshow(pairs, x=labels, y=labels, text_auto=True, aspect="auto",
+                        labels=dict(x=name, y=name, color="Incidents"),
+                        color_continuous_scale="algae")
+    fig.update_xaxes(tickangle=-45)
+    return fig
+
+def label_network(store, col, selected_ta, ACCESSIBLE_PALETTE, top_n=15):
+    col = col or "Techniques Used"
+    found = label_pairs(store, col, selected_ta, top_n=NETWORK_LABELS)
+    if found is None:
+        return unavailable(col)
+    pairs, labels, n_incidents = found
+
+    # Strongest associations first: each unordered pair once, by lift
+    a, b = np.triu_indices(len(labels), k=1)
+    keep = pairs[a, b] >= MIN_PAIR_SUPPORT
+    a, b = a[keep], b[keep]
+    lifts = lift(pairs, n_incidents)[a, b]
+    order = np.argsort(-lifts, kind="stable")[:top_n]
+    a, b, lifts = a[order], b[order], lifts[order]
+    if not len(a):
+        return message_figure(f"No pair of {PAIR_DIMENSIONS[col].lower()} shares {MIN_PAIR_SUPPORT} incidents.")
+
+    # Nodes on a circle, in label frequency order
+    nodes = sorted(set(a) | set(b))
+    angle = {node: 2 * np.pi * k / len(nodes) for k, node in enumerate(nodes)}
+    pos = {node: (np.cos(angle[node]), np.sin(angle[node])) for node in nodes}
+
+    # Line width follows the lift, rounded so edges of equal width share one
+    # trace of None-separated segments; at most 9 traces however many edges
+    widths = np.rint(1 + 2 * np.minimum(lifts, 4)).astype(int)
+    edge_traces = []
+    for width in np.unique(widths):
+        edge_x, edge_y = [], []
+        for i, j in zip(a[widths == width], b[widths == width]):
+            edge_x += [pos[i][0], pos[j][0], None]
+            edge_y += [pos[i][1], pos[j][1], None]
+        edge_traces.append(go.Scatter(x=edge_x, y=edge_y, mode="lines",
+                                      line=dict(width=int(width), color="rgba(100, 120, 160, 0.45)"),
+                                      hoverinfo="none"))
+    weight_trace = go.Scatter(
+        x=[(pos[i][0] + pos[j][0]) / 2 for i, j in zip(a, b)],
+        y=[(pos[i][1] + pos[j][1]) / 2 for i, j in zip(a, b)],
+        mode="markers", marker=dict(size=10, color=ACCESSIBLE_PALETTE[5], line=dict(width=1, color="white")),
+        text=[f"{labels[i]} + {labels[j]}<br>{pairs[i, j]:,} incidents, lift {value:.2f}"
+              for i, j, value in zip(a, b, lifts)],
+        hoverinfo="text",
+    )
+    node_trace = go.Scatter(
+        x=[pos[node][0] for node in nodes], y=[pos[node][1] for node in nodes],
+        mode="markers+text", text=[labels[node] for node in nodes], textposition="top center",
+        textfont=dict(size=14, color=ACCESSIBLE_PALETTE[0]),
+        marker=dict(size=[12 + 28 * np.sqrt(pairs[node, node] / pairs.diagonal().max()) for node in nodes],
+                    color=ACCESSIBLE_PALETTE[2], line=dict(width=2, color="black")),
+        hovertext=[f"{labels[node]}: {pairs[node, node]:,} incidents" for node in nodes], hoverinfo="text",
+    )
+    return go.Figure(data=[*edge_traces, weight_trace, node_trace], layout=go.Layout(
+        xaxis=dict(showgrid=False, zeroline=False, showticklabels=False, range=[-1.5, 1.5]),
+        yaxis=dict(showgrid=False, zeroline=False, showticklabels=False, range=[-1.3, 1.3]),
+        margin=dict(l=10, r=10, t=10, b=10), template="plotly_white", height=600,
+        autosize=True, showlegend=False))
@@ -1,16 +1,15 @@
 import plotly.express as px;
 
-def motiv_asset (df,selected_root, selected_asset):
+from components.figure_patch import group_series
 
-    root_df = df.copy()
-    if selected_root:
-            root_df = root_df[root_df["Root Cause (Why)"].isin(selected_root)]
-    if selected_asset:
-            root_df = root_df[root_df["Asset Type"].isin(selected_asset)]
+def motiv_asset_counts(store, selected_root, selected_asset):
+    return (store.counts({"Root Cause (Why)": selected_root, "Asset Type": selected_asset},
+                         ["Motivation", "Asset Label"])
+            .rename(columns={"Motivation": "Root Cause (Why)", "Asset Label": "Asset Type"}))
 
-    root_df["Root Cause (Why)"] = root_df["Root Cause (Why)"].fillna("Unknown")
-    root_df["Asset Type"] = root_df["Asset Type"].fillna("Unknown")
-    root_asset_counts = root_df.groupby(["Root Cause (Why)", "Asset Type"]).size().reset_index(name="Count")
+def motiv_asset (store, selected_root, selected_asset):
+
+    root_asset_counts = motiv_asset_counts(store, selected_root, selected_asset)
         
     fig_root_asset = px.bar(
             root_asset_counts, x="Root Cause (Why)", y="Count", color="Asset Type",
@@ -19,3 +18,7 @@ def motiv_asset (df,selected_root, selected_asset):
         )
     fig_root_asset.update_yaxes(type="log", title="Incident Count (log scale)", dtick=1)
     return fig_root_asset
+
+def motiv_asset_series(store, selected_root, selected_asset):
+    root_asset_counts = motiv_asset_counts(store, selected_root, selected_asset)
+    return group_series(root_asset_counts, "Asset Type", x="Root Cause (Why)", y="Count"), {}
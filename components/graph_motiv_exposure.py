@@ -1,18 +1,18 @@
 import plotly.express as px
 import numpy as np
-def motiv_exposure(df,rose_motivation_filter,rose_exposure_filter):
-    rose_df = df.copy()
-    rose_df["Motivation"] = rose_df["Root Cause (Why)"].fillna("Unknown")
-    if rose_motivation_filter:
-        rose_df = rose_df[rose_df["Motivation"].isin(rose_motivation_filter)]
-    
-    rose_df["Data exposure score"] = rose_df["Data exposure score"].fillna(-1)
-    rose_df["Exposure Label"] = rose_df["Data exposure score"].astype(str).replace("-1.0", "Unknown").replace("-1", "Unknown")
-    if rose_exposure_filter:
-        rose_df = rose_df[rose_df["Exposure Label"].isin(rose_exposure_filter)]
 
-    rose_counts = rose_df.groupby(["Motivation", "Exposure Label"]).size().reset_index(name="Actual_Count")
+from components.figure_patch import group_series
+
+def motiv_exposure_counts(store, rose_motivation_filter, rose_exposure_filter):
+    rose_counts = store.counts(
+        {"Motivation": rose_motivation_filter, "Exposure Label": rose_exposure_filter},
+        ["Motivation", "Exposure Label"], name="Actual_Count"
+    )
     rose_counts["Display_Size"] = np.sqrt(rose_counts["Actual_Count"])
+    return rose_counts
+
+def motiv_exposure(store, rose_motivation_filter, rose_exposure_filter):
+    rose_counts = motiv_exposure_counts(store, rose_motivation_filter, rose_exposure_filter)
 
     fig_rose = px.bar_polar(
         rose_counts, r="Display_Size", theta="Motivation", color="Exposure Label",
@@ -23,3 +23,9 @@ def motiv_exposure(df,rose_motivation_filter,rose_exposure_filter):
     
     fig_rose.update_layout(height=600, polar=dict(radialaxis=dict(showticklabels=False), angularaxis=dict(tickmode='array', tickvals=rose_counts["Motivation"].unique(), direction='clockwise')))
     return fig_rose
+
+def motiv_exposure_series(store, rose_motivation_filter, rose_exposure_filter):
+    rose_counts = motiv_exposure_counts(store, rose_motivation_filter, rose_exposure_filter)
+    series = group_series(rose_counts, "Exposure Label", r="Display_Size", theta="Motivation",
+                          customdata=["Actual_Count"])
+    return series, {"polar.angularaxis.tickvals": rose_counts["Motivation"].unique().tolist()}
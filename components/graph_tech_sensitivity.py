@@ -1,13 +1,17 @@
 import plotly.express as px
-def tech_sensitivity(df_exploded, selected_scores,selected_section5_tech):
-    dff = df_exploded.copy()
-    if selected_scores:
-        dff = dff[dff["Sensitivity_Label"].isin(selected_scores)]
-    if selected_section5_tech:
-        dff = dff[dff["Techniques Used"].isin(selected_section5_tech)]
 
-    dist_df = dff.groupby(["Techniques Used", "Sensitivity_Label"]).size().reset_index(name="Incident Count")
-    total_counts = dist_df.groupby("Techniques Used")["Incident Count"].sum().sort_values(ascending=False).index
+from components.figure_patch import group_series
+
+def tech_sensitivity_counts(store, selected_scores, selected_section5_tech):
+    dist_df = store.counts(
+        {"Sensitivity_Label": selected_scores, "Techniques Used": selected_section5_tech},
+        ["Techniques Used", "Sensitivity_Label"], cube="techniques", name="Incident Count"
+    )
+    total_counts = dist_df.groupby("Techniques Used", observed=True)["Incident Count"].sum().sort_values(ascending=False).index
+    return dist_df, total_counts
+
+def tech_sensitivity(store, selected_scores, selected_section5_tech):
+    dist_df, total_counts = tech_sensitivity_counts(store, selected_scores, selected_section5_tech)
     
     fig_tech_sens = px.bar(
         dist_df, x="Techniques Used", y="Incident Count", color="Sensitivity_Label",
@@ -16,4 +20,9 @@ def tech_sensitivity(df_exploded, selected_scores,selected_section5_tech):
         color_discrete_sequence=px.colors.qualitative.Safe, template="plotly_white", barmode="group" 
     )
     fig_tech_sens.update_yaxes(type="log", title="Incident Count (log scale)", dtick=1)
-    return fig_tech_sens
\ No newline at end of file
+    return fig_tech_sens
+
+def tech_sensitivity_series(store, selected_scores, selected_section5_tech):
+    dist_df, total_counts = tech_sensitivity_counts(store, selected_scores, selected_section5_tech)
+    series = group_series(dist_df, "Sensitivity_Label", x="Techniques Used", y="Incident Count")
+    return series, {"xaxis.categoryarray": total_counts.tolist()}
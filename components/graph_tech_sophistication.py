@@ -1,11 +1,12 @@
 import plotly.express as px
 
-def sophistication_bar (df,selected_ta):
-    soph_df = df.copy()
-    if selected_ta:
-        soph_df = soph_df[soph_df["Threat Actor"].isin(selected_ta)]
+from components.figure_patch import group_series
 
-    s_actor_counts = soph_df.groupby("Sophistication_Category").size().reset_index(name="Incident Count")
+def sophistication_counts(store, selected_ta):
+    return store.counts({"Threat Actor": selected_ta}, ["Sophistication_Category"], name="Incident Count")
+
+def sophistication_bar (store, selected_ta):
+    s_actor_counts = sophistication_counts(store, selected_ta)
     category_order = ["Unknown Technique", "Single Technique", "Multi-Technique (2–3)", "Multi-Stage (4+)"]
 
     fig_soph = px.bar(
@@ -16,16 +17,20 @@ def sophistication_bar (df,selected_ta):
     fig_soph.update_yaxes(type="log", title="Incident Count (log)", dtick=1)
     return fig_soph
 
-def tech_combination (df, selected_ta, format_combo):
-    combo_df = df.copy()
-    if selected_ta:
-        combo_df = combo_df[combo_df["Threat Actor"].isin(selected_ta)]
-    
-    combo_df["Combo_String"] = combo_df["Techniques Used"].apply(format_combo)
-    sophisticated_combos = combo_df[combo_df["Sophistication_Category"].isin(["Multi-Technique (2–3)", "Multi-Stage (4+)"])]
-    
-    combo_counts = sophisticated_combos["Combo_String"].value_counts().reset_index().head(10)
-    combo_counts.columns = ["Combination", "Incident Count"]
+def sophistication_series(store, selected_ta):
+    s_actor_counts = sophistication_counts(store, selected_ta)
+    return group_series(s_actor_counts, "Sophistication_Category", x="Sophistication_Category", y="Incident Count"), {}
+
+def combination_counts(store, selected_ta):
+    combo_counts = store.counts(
+        {"Threat Actor": selected_ta, "Sophistication_Category": ["Multi-Technique (2–3)", "Multi-Stage (4+)"]},
+        ["Combination"], cube="combinations", name="Incident Count"
+    )
+    return (combo_counts.astype({"Combination": str})
+            .sort_values(["Incident Count", "Combination"], ascending=[False, True]).head(10))
+
+def tech_combination (store, selected_ta):
+    combo_counts = combination_counts(store, selected_ta)
 
     fig_combo = px.bar(
         combo_counts, y="Combination", x="Incident Count", orientation='h',
@@ -36,3 +41,6 @@ def tech_combination (df, selected_ta, format_combo):
     fig_combo.update_layout(showlegend=False, yaxis={'categoryorder':'total ascending'}, margin=dict(l=350), height=550)
     return fig_combo
 
+def combination_series(store, selected_ta):
+    return group_series(combination_counts(store, selected_ta), x="Incident Count", y="Combination"), {}
+
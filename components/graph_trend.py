@@ -0,0 +1,27 @@
+import plotly.express as px
+
+from components.timeline import DATE_COLUMN
+
+GRANULARITIES = {"D": "Daily", "W": "Weekly", "M": "Monthly"}
+# Dimension a trend can be split by, and the per-day cube holding it
+TREND_DIMENSIONS = {
+    "Threat Actor": "daily",
+    "Techniques Used": "daily_techniques",
+    "Data Protection State": "daily",
+}
+
+def trend_line(store, group_by, granularity, start_date, end_date, selected_ta, ACCESSIBLE_PALETTE):
+    by = group_by or "Threat Actor"
+    freq = granularity or "W"
+    trend_counts = store.trend_counts(
+        {"Threat Actor": selected_ta}, by, start_date, end_date,
+        freq=freq, cube=TREND_DIMENSIONS[by], name="Incident Count"
+    )
+
+    fig_trend = px.line(
+        trend_counts, x=DATE_COLUMN, y="Incident Count", color=by,
+        title=f"{GRANULARITIES[freq]} Incidents by {by}",
+        color_discrete_sequence=ACCESSIBLE_PALETTE, template="plotly_white"
+    )
+    fig_trend.update_layout(hovermode="x unified", xaxis_title=None)
+    return fig_trend
@@ -0,0 +1,36 @@
+import json
+
+from flask import Response
+
+# ==============================================================================
+# HEALTH CHECKS
+# ==============================================================================
+# For orchestrators and load balancers:
+#
+#   GET /healthz   200 as soon as the server answers (liveness)
+#   GET /readyz    200 once an export is loaded, 503 until then (readiness)
+#
+# The export loads in the background, so neither endpoint waits for it.
+
+
+def json_response(body, status=200):
+    response = Response(json.dumps(body), status=status, mimetype="application/json")
+    response.cache_control.no_store = True
+    return response
+
+
+def init_app(server, dataset):
+    """Adds /healthz and /readyz to the Dash Flask server."""
+
+    @server.route("/healthz")
+    def healthz():
+        return json_response({"status": "ok"})
+
+    @server.route("/readyz")
+    def readyz():
+        data = dataset.current
+        if data is not None:
+            return json_response({"status": "ready", "version": data.version, "file": data.file_name})
+        if dataset.error:
+            return json_response({"status": "failed", "error": dataset.error}, status=503)
+        return json_response({"status": "loading"}, status=503)
@@ -0,0 +1,332 @@
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+from components.cube import CUBES, build_cubes
+from components.metrics import timed
+from components.multi_label import MULTI_LABEL_COLUMNS, LabelMatrix
+from components.text_index import TextIndex, parse_query
+from components.timeline import Timeline
+
+# ==============================================================================
+# INCIDENT STORE
+# ==============================================================================
+# Filterable incident columns. They are encoded as categoricals once at load
+# and every value gets a packed bitmap, so a multi-select filter is an OR of
+# bitmaps within a column and an AND across columns. Techniques are filtered
+# through the incident x technique matrix instead, one of the label matrices
+# kept for every multi-label column.
+ROW_FILTER_COLUMNS = [
+    "Threat Actor", "Data Protection State", "Root Cause (Why)", "Asset Type",
+    "Motivation", "Asset Label", "Exposure Label", "Sensitivity_Label",
+    "Sophistication_Category",
+]
+# Categorical too, but never filtered on by mask(): a combination has as many
+# values as there are distinct technique sets, so bitmaps would cost
+# incidents x combinations bits. Its counts come from the combinations cube.
+CATEGORICAL_COLUMNS = ROW_FILTER_COLUMNS + ["Combination"]
+# Other columns the cubes are built from; kept by save() so that a loaded
+# store can still build cubes over a subset of its rows
+CUBE_COLUMNS = [
+    col for col in dict.fromkeys(col for _, dimensions in CUBES.values() for col in dimensions)
+    if col not in CATEGORICAL_COLUMNS and col != "Techniques Used"
+]
+# Position of the first incident in each incident's near-duplicate group (see dedup)
+DUPLICATE_COLUMN = "Duplicate Of"
+# Whether the incident's group was already reported in an earlier export
+EARLIER_COLUMN = "Reported Earlier"
+# Everything the store keeps of the cleaned frame: what the bitmaps, cubes and
+# views read. Text columns and the per-row label lists are dropped once the
+# search index and label matrices are built from them.
+STORE_COLUMNS = CATEGORICAL_COLUMNS + CUBE_COLUMNS + [DUPLICATE_COLUMN, EARLIER_COLUMN]
+# Stores restricted by view(), kept per (query, unique)
+VIEW_CACHE_ENTRIES = 16
+
+
+def as_category(values):
+    # clean_data already returns these as categoricals; astype would copy them
+    return values if isinstance(values.dtype, pd.CategoricalDtype) else values.astype("category")
+
+
+def build_bitmaps(df, columns):
+    bitmaps = {}
+    for col in columns:
+        codes = df[col].cat.codes.to_numpy()
+        bitmaps[col] = {
+            value: np.packbits(codes == code)
+            for code, value in enumerate(df[col].cat.categories)
+        }
+    return bitmaps
+
+
+class IncidentStore:
+    def __init__(self, df, version=None, text_index=None):
+        self.version = version
+        self.label_matrices = {col: LabelMatrix(df[col]) for col in MULTI_LABEL_COLUMNS if col in df}
+        self.df = pd.DataFrame({
+            col: as_category(df[col]) if col in CATEGORICAL_COLUMNS else df[col]
+            for col in STORE_COLUMNS if col in df
+        }, copy=False)
+        self.techniques = self.label_matrices["Techniques Used"]
+        self.text_index = text_index
+        # Set on stores made by view(): the store and rows they were taken from
+        self._parent = self._rows = None
+        self._bitmaps = build_bitmaps(self.df, ROW_FILTER_COLUMNS)
+        self._cubes = build_cubes(self.df, self.techniques)
+        self._timelines = {}
+        self._views = OrderedDict()
+        self._view_lock = threading.Lock()
+
+    @classmethod
+    def from_cubes(cls, cubes, version=None):
+        """Aggregate-only store (streaming ingest): counts work, row selection does not."""
+        store = cls.__new__(cls)
+        store.version = version
+        store.df = store.techniques = store.text_index = None
+        store._bitmaps = None
+        store._cubes = cubes
+        store.label_matrices = {}
+        store._parent = store._rows = None
+        store._timelines = {}
+        store._views = OrderedDict()
+        store._view_lock = threading.Lock()
+        return store
+
+    def save(self, path):
+        """Writes the store's arrays into the existing directory path as .npy
+        files for load() to memory-map."""
+        n_bytes = (len(self.df) + 7) // 8
+        manifest = {"version": self.version, "columns": {},
+                    "labels": {col: labels.labels for col, labels in self.label_matrices.items()},
+                    "arrays": [col for col in self.df if col not in CATEGORICAL_COLUMNS]}
+        for i, col in enumerate(CATEGORICAL_COLUMNS):
+            categories = self.df[col].cat.categories.tolist()
+            np.save(os.path.join(path, f"codes-{i}.npy"), self.df[col].cat.codes.to_numpy())
+            manifest["columns"][col] = categories
+            if col in self._bitmaps:
+                bitmaps = [self._bitmaps[col][value] for value in categories]
+                np.save(os.path.join(path, f"bitmaps-{i}.npy"),
+                        np.stack(bitmaps) if bitmaps else np.empty((0, n_bytes), dtype=np.uint8))
+        for i, col in enumerate(manifest["arrays"]):
+            np.save(os.path.join(path, f"column-{i}.npy"), self.df[col].to_numpy())
+        for i, labels in enumerate(self.label_matrices.values()):
+            for part in ("data", "indices", "indptr"):
+                np.save(os.path.join(path, f"labels-{i}-{part}.npy"), getattr(labels.matrix, part))
+        pd.to_pickle(self._cubes, os.path.join(path, "cubes.pkl"))
+        if self.text_index is not None:
+            self.text_index.save(path)
+        with open(os.path.join(path, "manifest.json"), "w") as f:
+            json.dump(manifest, f)
+
+    @classmethod
+    def load(cls, path):
+        """Store over the read-only memory-mapped arrays written by save().
+
+        Processes loading the same path share one copy through the page cache.
+        df holds the same STORE_COLUMNS as the saved store.
+        """
+        with open(os.path.join(path, "manifest.json")) as f:
+            manifest = json.load(f)
+
+        def array(name):
+            return np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")
+
+        store = cls.__new__(cls)
+        store.version = manifest["version"]
+        columns, store._bitmaps = {}, {}
+        for i, (col, categories) in enumerate(manifest["columns"].items()):
+            columns[col] = pd.Categorical.from_codes(array(f"codes-{i}"), categories)
+            if col in ROW_FILTER_COLUMNS:
+                store._bitmaps[col] = dict(zip(categories, array(f"bitmaps-{i}")))
+        for i, col in enumerate(manifest["arrays"]):
+            columns[col] = array(f"column-{i}")
+        store.df = pd.DataFrame(columns, copy=False)
+        store.label_matrices = {}
+        for i, (col, labels) in enumerate(manifest["labels"].items()):
+            matrix = sp.csr_matrix(
+                (array(f"labels-{i}-data"), array(f"labels-{i}-indices"), array(f"labels-{i}-indptr")),
+                shape=(len(store.df), len(labels)), copy=False,
+            )
+            store.label_matrices[col] = LabelMatrix.from_csr(matrix, labels)
+        store.techniques = store.label_matrices["Techniques Used"]
+        store._parent = store._rows = None
+        store._cubes = pd.read_pickle(os.path.join(path, "cubes.pkl"))
+        store.text_index = TextIndex.load(path)
+        store._timelines = {}
+        store._views = OrderedDict()
+        store._view_lock = threading.Lock()
+        return store
+
+    @property
+    def total_records(self):
+        return int(self._cubes["incidents"].cells["count"].sum())
+
+    def mask(self, filters):
+        """Boolean incident mask for {column: selected values}, or None when nothing is selected."""
+        n_rows = len(self.df)
+        bits = None
+        for col, values in filters.items():
+            if not values:
+                continue
+            if col == "Techniques Used":
+                col_bits = np.packbits(self.techniques.rows_using(values))
+            else:
+                col_bits = np.zeros((n_rows + 7) // 8, dtype=np.uint8)
+                for value in values:
+                    if value in self._bitmaps[col]:
+                        col_bits |= self._bitmaps[col][value]
+            bits = col_bits if bits is None else bits & col_bits
+        if bits is None:
+            return None
+        return np.unpackbits(bits, count=n_rows).astype(bool)
+
+    @property
+    def has_duplicates(self):
+        return self.df is not None and DUPLICATE_COLUMN in self.df
+
+    def view(self, query=None, unique=False):
+        """Store over the incidents whose title or description contains every
+        query term, keeping only the first of each near-duplicate group when
+        unique is set (and no incident reported in an earlier export). It has its own cubes, so the graph builders work on it
+        unchanged. Returns self when neither narrows the incidents (or the
+        index or duplicate groups are missing).
+        """
+        terms = parse_query(query) if self.text_index is not None else ()
+        unique = bool(unique) and self.has_duplicates
+        if not terms and not unique:
+            return self
+        key = (terms, unique)
+        with self._view_lock:
+            if key in self._views:
+                self._views.move_to_end(key)
+                return self._views[key]
+        with timed("filter"):
+            rows = self.text_index.search(query) if terms else np.arange(len(self.df))
+            if unique:
+                # First matching incident of each group, in file order
+                _, first = np.unique(self.df[DUPLICATE_COLUMN].to_numpy()[rows], return_index=True)
+                rows = rows[np.sort(first)]
+                if EARLIER_COLUMN in self.df:
+                    rows = rows[~self.df[EARLIER_COLUMN].to_numpy()[rows]]
+        if len(rows) == len(self.df):
+            store = self
+        else:
+            with timed("aggregate"):
+                cubes = build_cubes(self.df.iloc[rows].reset_index(drop=True), self.techniques.take(rows))
+            store = IncidentStore.from_cubes(cubes, version=self.version)
+            store._parent, store._rows = self, rows
+        with self._view_lock:
+            self._views[key] = store
+            while len(self._views) > VIEW_CACHE_ENTRIES:
+                self._views.popitem(last=False)
+        return store
+
+    def counts(self, filters, by, cube="incidents", name="Count"):
+        """Group-by counts under the filters, answered from a pre-aggregated cube."""
+        return self._cubes[cube].counts(filters, by, name=name)
+
+    def values(self, col, cube="incidents"):
+        return self._cubes[cube].values(col)
+
+    def timeline(self, cube="daily"):
+        # Built from the per-day cube on first use
+        if cube not in self._timelines:
+            self._timelines[cube] = Timeline(self._cubes[cube].cells)
+        return self._timelines[cube]
+
+    def trend_counts(self, filters, by, start=None, end=None, freq="W", cube="daily", name="Count"):
+        """Counts per period and value of `by`, with the date range applied in the timeline."""
+        with timed("aggregate"):
+            return self.timeline(cube).counts(filters, by, start, end, freq, name=name)
+
+    # --------------------------------------------------------------------------
+    # Sparse technique counts under an arbitrary incident mask
+    # --------------------------------------------------------------------------
+    def technique_counts(self, col, mask=None, techniques=None, name="Count"):
+        """Counts of an incident column x technique, as (col, "Techniques Used", name) rows."""
+        values = self.df[col]
+        with timed("aggregate"):
+            counts, labels = self.techniques.cross_counts(
+                values.cat.codes.to_numpy(), len(values.cat.categories), mask, techniques
+            )
+        value_idx, technique_idx = np.nonzero(counts)
+        return pd.DataFrame({
+            col: pd.Categorical.from_codes(value_idx, values.cat.categories),
+            "Techniques Used": np.asarray(labels, dtype=object)[technique_idx],
+            name: counts[value_idx, technique_idx],
+        })
+
+    def actor_technique_counts(self, mask=None, techniques=None, name="Count"):
+        return self.technique_counts("Threat Actor", mask, techniques, name)
+
+    def technique_sensitivity_counts(self, mask=None, techniques=None, name="Count"):
+        return self.technique_counts("Sensitivity_Label", mask, techniques, name)[
+            ["Techniques Used", "Sensitivity_Label", name]
+        ]
+
+    # --------------------------------------------------------------------------
+    # Counts over the incidents themselves, for combinations no cube holds
+    # --------------------------------------------------------------------------
+    @property
+    def has_rows(self):
+        """Whether row_counts() can answer (not on streamed or view stores)."""
+        return self.df is not None
+
+    def row_counts(self, filters, by, name="Count"):
+        """Group-by counts under the filters, computed from the bitmaps and the
+        technique matrix instead of a cube. When techniques are filtered or
+        grouped on, every incident x technique pair counts, as in the
+        techniques cube; otherwise every incident does.
+        """
+        selected = filters.get("Techniques Used")
+        with timed("filter"):
+            mask = self.mask({col: values for col, values in filters.items() if col != "Techniques Used"})
+            if selected or "Techniques Used" in by:
+                rows, codes, weights = self.techniques.entries()
+                keep = np.ones(len(rows), dtype=bool) if mask is None else mask[rows]
+                if selected:
+                    keep &= np.isin(codes, self.techniques.columns(selected))
+                rows, codes, weights = rows[keep], codes[keep], weights[keep]
+            else:
+                rows = np.arange(len(self.df)) if mask is None else np.flatnonzero(mask)
+                codes, weights = None, np.ones(len(rows), dtype=np.int64)
+        with timed("aggregate"):
+            columns = {
+                col: pd.Categorical.from_codes(codes, self.techniques.labels) if col == "Techniques Used"
+                else self.df[col].take(rows).reset_index(drop=True)
+                for col in by
+            }
+            return (pd.DataFrame(columns).assign(**{name: weights})
+                    .groupby(list(by), observed=True)[name].sum()
+                    .reset_index())
+
+    # --------------------------------------------------------------------------
+    # Label co-occurrence under an arbitrary incident mask
+    # --------------------------------------------------------------------------
+    def has_labels(self, col):
+        """Whether label_pairs() can answer for col (not on streamed stores)."""
+        store = self if self._parent is None else self._parent
+        return col in store.label_matrices
+
+    def label_pairs(self, col, filters, top_n=None, rows=None):
+        """(co-occurrence counts, labels, incidents) of a multi-label column
+        for the incidents matching the filters (and within rows, if given):
+        see LabelMatrix.co_occurrence. Stores made by view() answer from the
+        store they were taken from.
+        """
+        if self._parent is not None:
+            return self._parent.label_pairs(col, filters, top_n, rows=self._rows)
+        with timed("filter"):
+            mask = self.mask(filters)
+            if rows is not None:
+                in_rows = np.zeros(len(self.df), dtype=bool)
+                in_rows[rows] = True
+                mask = in_rows if mask is None else mask & in_rows
+        with timed("aggregate"):
+            pairs, labels = self.label_matrices[col].co_occurrence(mask, top_n)
+        return pairs, labels, len(self.df) if mask is None else int(mask.sum())
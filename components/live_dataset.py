@@ -0,0 +1,146 @@
+import glob
+import os
+import threading
+import time
+import warnings
+
+from components.data_handler import DATA_DIR, dataset_version
+
+# ==============================================================================
+# HOT RELOAD
+# ==============================================================================
+# The loaded export is held as one immutable snapshot. A background thread
+# loads the first export, so the server can answer requests while it does, and
+# then polls data/: when a newer or rewritten export appears, it is loaded the
+# same way and replaces the snapshot with a single assignment. Callbacks read
+# `current` once, so a request already running keeps the snapshot it started with.
+class Dataset:
+    def __init__(self, file_name, store, total_records, month_name):
+        self.file_name = file_name
+        self.store = store
+        self.total_records = total_records
+        self.month_name = month_name
+
+    @property
+    def version(self):
+        return self.store.version
+
+
+class LiveDataset:
+    def __init__(self, loader, file_name, pattern="*.csv", poll_seconds=5, watch=True, on_load=None):
+        """loader(file_name) returns (store, total_records, month_name).
+
+        Nothing is loaded until start() or load(). With watch set, the thread
+        started by start() keeps polling for newer exports afterwards.
+        on_load(dataset) runs in the loading thread after every swap.
+        """
+        self.loader = loader
+        self.file_name = file_name
+        self.pattern = pattern
+        self.poll_seconds = poll_seconds
+        self.watching = watch
+        self.on_load = on_load
+        self.current = None
+        # Why the first export could not be loaded, until one is
+        self.error = None
+        self._pending = None
+        self._failed = set()
+        self._thread = None
+        self._thread_pid = None
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+
+    @property
+    def ready(self):
+        return self.current is not None
+
+    @property
+    def store(self):
+        return self.current.store if self.current is not None else None
+
+    @property
+    def version(self):
+        return self.current.version if self.current is not None else None
+
+    def load(self):
+        """Loads the first export in the calling thread unless it is loaded
+        already, and returns the current Dataset. For scripts that need the
+        data straight away; loader errors propagate."""
+        with self._load_lock:
+            if self.current is None:
+                self._swap(self.file_name, self.loader(self.file_name))
+        return self.current
+
+    def _swap(self, file_name, loaded):
+        self.current = Dataset(file_name, *loaded)
+        self.error = None
+        if self.on_load is not None:
+            try:
+                self.on_load(self.current)
+            except Exception as e:  # the data itself is in place; only the extras failed
+                warnings.warn(f"Loaded {file_name}, but on_load failed: {e}")
+
+    def newest_export(self):
+        """(file name, version) of the most recently modified export, or None."""
+        candidates = []
+        for path in glob.glob(os.path.join(DATA_DIR, self.pattern)):
+            try:
+                candidates.append((os.stat(path).st_mtime_ns, path))
+            except OSError:  # removed since the glob
+                continue
+        if not candidates:
+            return None
+        file_name = os.path.basename(max(candidates)[1])
+        try:
+            return file_name, dataset_version(file_name)
+        except OSError:
+            return None
+
+    def poll(self):
+        """Loads and swaps in the newest export if it changed. Returns True on a swap."""
+        found = self.newest_export()
+        if found is None or found[1] == self.version or found[1] in self._failed:
+            self._pending = None
+            return False
+        # Only load once the file looks the same on two polls in a row, so an
+        # export that is still being copied in is not read half-written
+        if found != self._pending:
+            self._pending = found
+            return False
+        self._pending = None
+
+        file_name, version = found
+        try:
+            loaded = self.loader(file_name)
+        except Exception as e:  # a bad export must not take the watcher down
+            warnings.warn(f"Keeping the current data; could not load {file_name}: {e}")
+            self._failed.add(version)
+            return False
+        self._swap(file_name, loaded)
+        return True
+
+    def start(self):
+        """Starts the loading (and, with watch set, polling) thread. Safe to
+        call repeatedly, including in forked workers, which do not inherit
+        their parent's threads."""
+        with self._lock:
+            if self._thread is not None and self._thread_pid == os.getpid():
+                return
+            self._thread = threading.Thread(target=self._run, name="dataset-loader", daemon=True)
+            self._thread_pid = os.getpid()
+            self._thread.start()
+
+    def _run(self):
+        try:
+            self.load()
+        except Exception as e:
+            self.error = f"could not load {self.file_name}: {e}"
+            warnings.warn(f"No data yet; {self.error}")
+            try:
+                # Not retried until it changes; a newer export is picked up by poll()
+                self._failed.add(dataset_version(self.file_name))
+            except OSError:
+                pass
+        while self.watching:
+            time.sleep(self.poll_seconds)
+            self.poll()
@@ -0,0 +1,207 @@
+import contextvars
+import cProfile
+import os
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from urllib.parse import parse_qs, urlparse
+
+from flask import Response, g, has_request_context, request
+
+try:
+    import pyinstrument
+except ImportError:
+    pyinstrument = None
+
+# ==============================================================================
+# HOT-PATH METRICS
+# ==============================================================================
+# Per-figure latency broken down by stage (filter, aggregate, figure_build,
+# serialise) plus response size, exposed in Prometheus text format.
+TIME_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SIZE_BUCKETS = (1_000, 10_000, 50_000, 100_000, 250_000, 500_000, 1_000_000, 5_000_000)
+
+# Figure whose callback is running, and the stage time recorded so far in it
+current_figure = contextvars.ContextVar("current_figure", default=None)
+stage_totals = contextvars.ContextVar("stage_totals", default=None)
+
+
+class Histogram:
+    def __init__(self, name, documentation, buckets):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._series.setdefault(key, [[0] * len(self.buckets), 0.0, 0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, (bucket_counts, total, count) in sorted(self._series.items()):
+                labels = ",".join(f'{k}="{v}"' for k, v in key)
+                sep = "," if labels else ""
+                for bound, bucket_count in zip(self.buckets, bucket_counts):
+                    lines.append(f'{self.name}_bucket{{{labels}{sep}le="{bound}"}} {bucket_count}')
+                lines.append(f'{self.name}_bucket{{{labels}{sep}le="+Inf"}} {count}')
+                lines.append(f"{self.name}_sum{{{labels}}} {total}")
+                lines.append(f"{self.name}_count{{{labels}}} {count}")
+        return lines
+
+
+STAGE_SECONDS = Histogram(
+    "dashboard_stage_duration_seconds", "Time spent per figure in each stage.", TIME_BUCKETS)
+CALLBACK_SECONDS = Histogram(
+    "dashboard_callback_duration_seconds", "Figure callback time, excluding serialisation.", TIME_BUCKETS)
+REQUEST_SECONDS = Histogram(
+    "dashboard_request_duration_seconds", "Whole callback request time, including serialisation.", TIME_BUCKETS)
+RESPONSE_BYTES = Histogram(
+    "dashboard_response_bytes", "Size of the JSON sent back per callback.", SIZE_BUCKETS)
+
+
+@contextmanager
+def timed(stage):
+    """Records the block's duration as `stage` of the figure being built, if any."""
+    figure = current_figure.get()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if figure is not None:
+            elapsed = time.perf_counter() - start
+            STAGE_SECONDS.observe(elapsed, figure=figure, stage=stage)
+            stage_totals.get()[0] += elapsed
+
+
+def instrument(figure, build):
+    """Times a figure callback. Whatever the filter and aggregate stages inside
+    it do not account for is recorded as figure_build."""
+    @wraps(build)
+    def wrapper(*args):
+        token = current_figure.set(figure)
+        totals_token = stage_totals.set([0.0])
+        start = time.perf_counter()
+        try:
+            return build(*args)
+        finally:
+            elapsed = time.perf_counter() - start
+            STAGE_SECONDS.observe(max(elapsed - stage_totals.get()[0], 0.0), figure=figure, stage="figure_build")
+            current_figure.reset(token)
+            stage_totals.reset(totals_token)
+            CALLBACK_SECONDS.observe(elapsed, figure=figure)
+            # Lets after_request split the request into callback and serialisation
+            if has_request_context():
+                g.callback_seconds = getattr(g, "callback_seconds", 0.0) + elapsed
+    return wrapper
+
+
+def render_metrics(figure_cache=None):
+    lines = []
+    for histogram in (STAGE_SECONDS, CALLBACK_SECONDS, REQUEST_SECONDS, RESPONSE_BYTES):
+        lines += histogram.render()
+    if figure_cache is not None:
+        stats = figure_cache.stats()
+        for name in ("hits", "misses", "evictions"):
+            lines += [f"# TYPE dashboard_figure_cache_{name}_total counter",
+                      f"dashboard_figure_cache_{name}_total {stats[name]}"]
+        for name in ("entries", "bytes"):
+            lines += [f"# TYPE dashboard_figure_cache_{name} gauge",
+                      f"dashboard_figure_cache_{name} {stats[name]}"]
+    return "\n".join(lines) + "\n"
+
+
+# ==============================================================================
+# FLASK HOOKS
+# ==============================================================================
+def callback_figure():
+    # Dash posts {"output": "main-viz.figure", ...} to /_dash-update-component
+    body = request.get_json(silent=True) or {}
+    return str(body.get("output", "unknown")).removesuffix(".figure")
+
+
+def profiling_requested():
+    # The flag sits on the page URL, which callback requests carry as Referer
+    if "profile" in request.args:
+        return request.args["profile"]
+    referrer_query = parse_qs(urlparse(request.referrer or "").query)
+    return referrer_query.get("profile", [None])[0]
+
+
+_profile_lock = threading.Lock()
+
+
+def start_profile(mode):
+    # Only one profiler can run per process, so concurrent requests go unprofiled
+    if not _profile_lock.acquire(blocking=False):
+        return None
+    if mode == "pyinstrument" and pyinstrument is not None:
+        profiler = pyinstrument.Profiler()
+        profiler.start()
+    else:
+        profiler = cProfile.Profile()
+        profiler.enable()
+    return profiler
+
+
+def stop_profile(profiler, profile_dir, label):
+    try:
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        path = os.path.join(profile_dir, f"{stamp}-{label}-{threading.get_ident()}")
+        if isinstance(profiler, cProfile.Profile):
+            profiler.disable()
+            profiler.dump_stats(path + ".prof")
+        else:
+            profiler.stop()
+            with open(path + ".html", "w") as f:
+                f.write(profiler.output_html())
+    finally:
+        _profile_lock.release()
+
+
+def init_app(server, figure_cache=None, profile_dir=None):
+    """Adds /metrics and callback timing to the Dash Flask server.
+
+    When profile_dir is set, requests from a page opened with ?profile=1
+    (or ?profile=pyinstrument) are profiled and dumped there.
+    """
+    if profile_dir:
+        os.makedirs(profile_dir, exist_ok=True)
+
+    @server.route("/metrics")
+    def metrics():
+        return Response(render_metrics(figure_cache), mimetype="text/plain; version=0.0.4")
+
+    @server.before_request
+    def start_timer():
+        g.request_start = time.perf_counter()
+        mode = profiling_requested() if profile_dir else None
+        g.profiler = start_profile(mode) if mode else None
+
+    @server.after_request
+    def record(response):
+        if request.path.endswith("_dash-update-component") and "request_start" in g:
+            figure = callback_figure()
+            total = time.perf_counter() - g.request_start
+            REQUEST_SECONDS.observe(total, figure=figure)
+            RESPONSE_BYTES.observe(response.calculate_content_length() or 0, figure=figure)
+            if "callback_seconds" in g:
+                STAGE_SECONDS.observe(max(total - g.callback_seconds, 0.0), figure=figure, stage="serialise")
+        return response
+
+    @server.teardown_request
+    def finish_profile(_exc):
+        # Runs even when the request failed, so the profiler lock is always released
+        if g.get("profiler") is not None:
+            label = callback_figure() if request.path.endswith("_dash-update-component") else "page"
+            stop_profile(g.profiler, profile_dir, label.replace("/", "_").replace(".", "_"))
+            g.profiler = None
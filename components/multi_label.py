@@ -0,0 +1,113 @@
+from itertools import chain
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+# ==============================================================================
+# MULTI-LABEL DIMENSIONS
+# ==============================================================================
+# Columns holding a comma-separated list per incident. schema.validate splits
+# them into lists, and the store turns each into a sparse incident x label
+# matrix instead of an exploded frame, so adding a column here costs one
+# matrix (about 12 bytes per label mention), not another copy of the data.
+MULTI_LABEL_COLUMNS = ["Techniques Used", "LINDDUN categories", "Jurisdiction"]
+# What an incident without any labels lists; left out of co-occurrence
+UNKNOWN_LABEL = "Unknown"
+
+
+class LabelMatrix:
+    """Sparse (CSR) incident x label matrix built from per-incident label lists.
+
+    Replaces the exploded frame: label counts against any incident-level
+    column are a sparse product, a label filter is a column slice, and label
+    pairs are the product of the matrix with itself.
+    """
+
+    def __init__(self, label_lists):
+        lengths = np.fromiter(map(len, label_lists), dtype=np.int64, count=len(label_lists))
+        codes, tokens = pd.factorize(np.array(list(chain.from_iterable(label_lists)), dtype=object))
+        # Trimmed and sorted per distinct token, so " a" and "a" are one label
+        labels, codes_of_token = np.unique(
+            np.array([str(token).strip() for token in tokens], dtype=object), return_inverse=True
+        )
+        self.labels = labels.tolist()
+        indptr = np.concatenate([[0], np.cumsum(lengths)])
+        self.matrix = sp.csr_matrix(
+            (np.ones(len(codes), dtype=np.int32), codes_of_token[codes].astype(np.int32), indptr),
+            shape=(len(lengths), len(self.labels)),
+        )
+        # An incident listing the same label twice keeps a count of 2
+        self.matrix.sum_duplicates()
+
+    @classmethod
+    def from_csr(cls, matrix, labels):
+        """Wraps an existing CSR matrix (e.g. over memory-mapped arrays) without copying."""
+        self = cls.__new__(cls)
+        self.labels = list(labels)
+        self.matrix = matrix
+        return self
+
+    def __len__(self):
+        return self.matrix.shape[0]
+
+    def take(self, rows):
+        """Matrix over the given incidents only, in that order."""
+        return LabelMatrix.from_csr(self.matrix[rows], self.labels)
+
+    def columns(self, labels):
+        lookup = {t: i for i, t in enumerate(self.labels)}
+        return [lookup[t] for t in labels if t in lookup]
+
+    def entries(self):
+        """(row, label code, count) for every non-zero entry."""
+        rows = np.repeat(np.arange(len(self)), np.diff(self.matrix.indptr))
+        return rows, self.matrix.indices, self.matrix.data
+
+    def rows_using(self, labels):
+        """Incidents that have any of the given labels."""
+        return self.matrix[:, self.columns(labels)].getnnz(axis=1) > 0
+
+    def cross_counts(self, codes, n_values, mask=None, labels=None):
+        """Dense (value x label) counts for an incident-level code array,
+        returned with the labels of its columns.
+
+        Codes of -1 (missing values) are left out.
+        """
+        codes = np.asarray(codes)
+        present = codes >= 0
+        if mask is not None:
+            present &= mask
+        rows = np.flatnonzero(present)
+        onehot = sp.csr_matrix(
+            (np.ones(len(rows), dtype=np.int32), (codes[rows], rows)),
+            shape=(n_values, len(self)),
+        )
+        columns = np.arange(len(self.labels)) if labels is None else self.columns(labels)
+        return (onehot @ self.matrix[:, columns]).toarray(), [self.labels[i] for i in columns]
+
+    def co_occurrence(self, mask=None, top_n=None):
+        """Dense (label x label) counts of the incidents under mask that have
+        both labels, returned with their labels. The diagonal counts the
+        incidents with each label. Keeps the top_n most frequent labels;
+        UNKNOWN_LABEL is left out.
+        """
+        indicator = self.matrix if mask is None else self.matrix[np.flatnonzero(mask)]
+        # Presence only: a label listed twice still makes one incident
+        indicator = (indicator > 0).astype(np.int32)
+        support = np.asarray(indicator.sum(axis=0)).ravel()
+        columns = [i for i in np.argsort(-support, kind="stable")
+                   if support[i] > 0 and self.labels[i] != UNKNOWN_LABEL][:top_n]
+        indicator = indicator[:, columns]
+        return (indicator.T @ indicator).toarray(), [self.labels[i] for i in columns]
+
+
+def lift(pairs, n_incidents):
+    """Lift of every label pair from co_occurrence() counts: how much more
+    often the two labels occur together than if they were independent,
+    P(a and b) / (P(a) P(b)). 1 is independence; the diagonal is NaN."""
+    support = np.diag(pairs).astype(float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        values = pairs * float(n_incidents) / np.outer(support, support)
+    np.fill_diagonal(values, np.nan)
+    return values
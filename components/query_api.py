@@ -0,0 +1,186 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+from flask import Response, request
+
+from components.cube import CUBES
+
+# ==============================================================================
+# QUERY API
+# ==============================================================================
+# Read-only JSON access to the same count cubes the figures aggregate from:
+#
+#   GET /api/counts?by=actor,technique&actor=Insider&sensitivity=4&limit=50
+#   GET /api/dimensions
+#
+# Filters may be repeated (actor=A&actor=B); values can contain commas, so
+# only `by` is comma-separated. Responses carry an ETag derived from the
+# dataset version and the query, so clients polling with If-None-Match get a
+# 304 until a new export is loaded. Until the first export has loaded, both
+# answer 503.
+DIMENSIONS = {
+    "actor": "Threat Actor",
+    "technique": "Techniques Used",
+    "root_cause": "Root Cause (Why)",
+    "asset_type": "Asset Type",
+    "protection": "Data Protection State",
+    "sensitivity": "Sensitivity_Label",
+    "exposure": "Exposure Label",
+}
+# Queries are answered by the first cube holding every dimension they use.
+# Other combinations are counted from the store's rows (IncidentStore.row_counts),
+# which only streamed exports lack. Technique counts are per incident x
+# technique pair, as in the figures.
+QUERY_CUBES = ("incidents", "techniques")
+PAGE_PARAMS = {"by", "limit", "offset"}
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 10_000
+
+
+class QueryError(ValueError):
+    pass
+
+
+def parse_query(args):
+    """(by, filters) as sorted tuples of dimension names, from request args."""
+    unknown = set(args) - set(DIMENSIONS) - PAGE_PARAMS
+    if unknown:
+        raise QueryError(f"Unknown parameters: {', '.join(sorted(unknown))}")
+    by = [name.strip() for value in args.getlist("by") for name in value.split(",") if name.strip()]
+    if not by:
+        raise QueryError(f"`by` is required, one or more of: {', '.join(DIMENSIONS)}")
+    bad = [name for name in by if name not in DIMENSIONS]
+    if bad:
+        raise QueryError(f"Cannot group by {', '.join(bad)}; choose from: {', '.join(DIMENSIONS)}")
+    filters = tuple(sorted(
+        (name, tuple(sorted(set(args.getlist(name)))))
+        for name in DIMENSIONS if args.getlist(name)
+    ))
+    return tuple(dict.fromkeys(by)), filters
+
+
+def cube_groups():
+    """Dimension names each query cube holds, i.e. what a streamed export can combine."""
+    return [[name for name, col in DIMENSIONS.items() if col in CUBES[cube][1]] for cube in QUERY_CUBES]
+
+
+def choose_cube(names):
+    """The first query cube holding every dimension in names, or None."""
+    columns = {DIMENSIONS[name] for name in names}
+    for cube in QUERY_CUBES:
+        if columns <= set(CUBES[cube][1]):
+            return cube
+    return None
+
+
+def count_table(store, by, filters):
+    names = set(by) | {name for name, _ in filters}
+    filters = {DIMENSIONS[name]: list(values) for name, values in filters}
+    by = [DIMENSIONS[name] for name in by]
+    cube = choose_cube(names)
+    if cube is not None:
+        return store.counts(filters, by, cube=cube, name="count")
+    if store.has_rows:
+        return store.row_counts(filters, by, name="count")
+    supported = "; ".join(", ".join(group) for group in cube_groups())
+    raise QueryError(f"These dimensions cannot be combined on a streamed export: {', '.join(sorted(names))}. "
+                     f"Supported combinations: {supported}")
+
+
+def page_bounds(args):
+    try:
+        limit = int(args.get("limit", DEFAULT_LIMIT))
+        offset = int(args.get("offset", 0))
+    except ValueError:
+        raise QueryError("`limit` and `offset` must be integers") from None
+    if not 0 < limit <= MAX_LIMIT or offset < 0:
+        raise QueryError(f"`limit` must be between 1 and {MAX_LIMIT}, `offset` at least 0")
+    return limit, offset
+
+
+class CountQueries:
+    """Grouped counts per (dataset version, query), most recently used kept.
+
+    Only the aggregation is cached; pages are sliced from it per request.
+    """
+
+    def __init__(self, dataset, max_entries=512):
+        self.dataset = dataset
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def rows(self, by, filters):
+        data = self.dataset.current  # one snapshot for the whole request
+        key = (data.version, by, filters)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return data.version, self._entries[key]
+        table = count_table(data.store, by, filters)
+        # Largest groups first; ties in dimension order so pages are stable
+        table = (table.sort_values(["count", *table.columns[:-1]], ascending=[False] + [True] * len(by))
+                 .rename(columns={DIMENSIONS[name]: name for name in by}))
+        table[list(by)] = table[list(by)].astype(object).where(table[list(by)].notna(), None)
+        rows = table.to_dict("records")
+        with self._lock:
+            self._entries[key] = rows
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return data.version, rows
+
+
+def json_response(body, status=200):
+    return Response(json.dumps(body, default=str), status=status, mimetype="application/json")
+
+
+def not_ready():
+    return json_response({"error": "The data is still loading; try again shortly"}, status=503)
+
+
+def init_app(server, dataset):
+    """Adds /api/counts and /api/dimensions to the Dash Flask server."""
+    queries = CountQueries(dataset)
+
+    @server.route("/api/counts")
+    def api_counts():
+        if not dataset.ready:
+            return not_ready()
+        try:
+            by, filters = parse_query(request.args)
+            limit, offset = page_bounds(request.args)
+            version, rows = queries.rows(by, filters)
+        except QueryError as e:
+            return json_response({"error": str(e)}, status=400)
+
+        etag = hashlib.blake2b(repr((version, by, filters, limit, offset)).encode(), digest_size=16).hexdigest()
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+        else:
+            next_offset = offset + limit if offset + limit < len(rows) else None
+            response = json_response({
+                "version": version, "by": list(by), "filters": dict(filters),
+                "total": len(rows), "offset": offset, "limit": limit, "next_offset": next_offset,
+                "counts": rows[offset:offset + limit],
+            })
+        response.set_etag(etag)
+        # Cached copies must be revalidated, which the ETag makes cheap
+        response.cache_control.no_cache = True
+        return response
+
+    @server.route("/api/dimensions")
+    def api_dimensions():
+        data = dataset.current
+        if data is None:
+            return not_ready()
+        store = data.store
+        return json_response({
+            "version": data.version,
+            "dimensions": {
+                name: {"column": col, "values": store.values(col, cube=choose_cube({name}))}
+                for name, col in DIMENSIONS.items()
+            },
+            "combinable": [list(DIMENSIONS)] if store.has_rows else cube_groups(),
+        })
@@ -0,0 +1,127 @@
+import warnings
+from functools import wraps
+
+from dash import DiskcacheManager, Input, Output, callback, ctx
+from dash.exceptions import PreventUpdate
+
+from components.figure_patch import figure_patch
+from components.metrics import instrument
+
+# ==============================================================================
+# FIGURE REGISTRY
+# ==============================================================================
+# Maps each graph id to the filter dropdown ids it reads and the function that
+# builds it. Every figure gets its own callback, so changing a dropdown only
+# rebuilds the figures that actually depend on it.
+FIGURE_REGISTRY = {}
+# Optional per-graph function returning just the data arrays (see figure_patch)
+SERIES_REGISTRY = {}
+# Expensive graphs that run as background callbacks when a manager is given
+BACKGROUND_FIGURES = set()
+
+# How often the browser polls a running background callback
+BACKGROUND_POLL_MS = 250
+
+def register_figure(output_id, filter_ids, background=False):
+    def decorator(build):
+        FIGURE_REGISTRY[output_id] = (list(filter_ids), build)
+        if background:
+            BACKGROUND_FIGURES.add(output_id)
+        return build
+    return decorator
+
+def register_series(output_id):
+    def decorator(series):
+        SERIES_REGISTRY[output_id] = series
+        return series
+    return decorator
+
+def lean_update(build, series, refresh_id=None):
+    @wraps(build)
+    def update(*values):
+        # The first call of a page load has no figure on the client to patch,
+        # and a new dataset may bring traces the client has never seen
+        if ctx.triggered_id is None or ctx.triggered_id == refresh_id:
+            return build(*values)
+        # The unfiltered figure supplies trace styling; it is nearly always cached
+        return figure_patch(build(*[None] * len(values)), *series(*values))
+    return update
+
+def wait_for_data(build, ready):
+    @wraps(build)
+    def update(*values):
+        if not ready():
+            raise PreventUpdate
+        return build(*values)
+    return update
+
+def background_manager(cache_dir, version):
+    """Runs background callbacks in worker processes and keeps their results in
+    a disk cache keyed on version(). None when dash[diskcache] is missing."""
+    try:
+        import diskcache
+        return DiskcacheManager(diskcache.Cache(cache_dir), cache_by=[version])
+    except ImportError as e:
+        warnings.warn(f"Background callbacks disabled, graphs build in the request thread: {e}")
+        return None
+
+def filter_input(filter_id):
+    # "component-id.property" for controls whose selection is not in "value",
+    # such as the start_date of a date range picker
+    component_id, _, prop = filter_id.partition(".")
+    return Input(component_id, prop or "value")
+
+def initial_values(layout):
+    """{filter id: value the layout starts with} for every registered filter;
+    None where the layout leaves it unset."""
+    props = {}
+    for component in [layout, *layout._traverse()]:
+        component_id = getattr(component, "id", None)
+        if isinstance(component_id, str):
+            props[component_id] = component
+    values = {}
+    for filter_ids, _ in FIGURE_REGISTRY.values():
+        for filter_id in filter_ids:
+            component_id, _, prop = filter_id.partition(".")
+            values[filter_id] = getattr(props.get(component_id), prop or "value", None)
+    return values
+
+def initial_figures(values):
+    """Every registered figure as a page first shows it, given initial_values()."""
+    return {output_id: build(*[values[f] for f in filter_ids])
+            for output_id, (filter_ids, build) in FIGURE_REGISTRY.items()}
+
+def register_callbacks(lean=False, manager=None, refresh_id=None, ready=None, prerendered=False):
+    """One callback per registered figure. With lean=True, figures that have a
+    series function answer filter changes with a data-only Patch. With a
+    background manager, the graphs registered with background=True build in
+    worker processes, and a filter change cancels the job still running for
+    the previous selection. refresh_id names a dcc.Store whose data changes
+    when a new dataset is swapped in; every figure is rebuilt then.
+
+    ready() tells whether there is data yet; until then the graphs keep what
+    they show. With prerendered set, the layout already carries the initial
+    figures (see initial_figures), so page loads do not call back for them.
+    """
+    for output_id, (filter_ids, build) in FIGURE_REGISTRY.items():
+        options = {"prevent_initial_call": True} if prerendered else {}
+        if lean and filter_ids and output_id in SERIES_REGISTRY:
+            # Patches are cheap enough to stay in the request thread
+            build = lean_update(build, SERIES_REGISTRY[output_id], refresh_id)
+        elif manager is not None and output_id in BACKGROUND_FIGURES:
+            options.update(background=True, manager=manager, interval=BACKGROUND_POLL_MS)
+        inputs = [filter_input(filter_id) for filter_id in filter_ids]
+        # Timed outside the figure cache, so hits show up as fast callbacks
+        timed_build = instrument(output_id, build)
+        if ready is not None:
+            timed_build = wait_for_data(timed_build, ready)
+        if refresh_id:
+            inputs.append(Input(refresh_id, "data"))
+            update = lambda *values, build=timed_build: build(*values[:-1])
+        elif filter_ids:
+            update = timed_build
+        else:
+            # Figures without filters only fire once per page load, keyed on their own id
+            inputs = [Input(output_id, "id")]
+            update = lambda _id, build=timed_build: build()
+        callback(Output(output_id, "figure"), inputs, **options)(update)
@@ -0,0 +1,107 @@
+import numpy as np
+import pandas as pd
+
+from components.multi_label import MULTI_LABEL_COLUMNS, UNKNOWN_LABEL
+
+# ==============================================================================
+# EXPORT SCHEMA
+# ==============================================================================
+# Every export goes through validate() once at load. It checks the columns the
+# dashboard reads and rewrites them into one canonical form:
+#   scores      integers in [0, max], with -1 for unknown, missing or invalid
+#   labels      trimmed text; any casing of "unknown" becomes "Unknown"
+#   lists       multi-label columns (techniques, LINDDUN categories,
+#               jurisdictions) as lists of trimmed names, ["Unknown"] when
+#               none are given
+#   dates       parsed to datetimes; unparseable ones become NaT
+# Values that had to be replaced are listed in an issues table, one row per
+# (row, column). String work is done once per distinct value, not per row.
+UNKNOWN_SCORE = -1
+SCORES = {"Data exposure score": 3, "Data Sensitivity score": 4, "Identification score": 3}
+LABELS = ["Threat Actor", "Data Protection State", "Root Cause (Why)", "Asset Type"]
+TECHNIQUES = "Techniques Used"
+DATE = "Date of occurrence"
+# Columns without which the dashboard cannot be built
+REQUIRED = [DATE, "Data exposure score", "Data Sensitivity score", *LABELS, TECHNIQUES]
+UNKNOWN_TEXT = {"", "nan", "unknown", "none"}
+
+
+def per_value(series, normalise):
+    """Applies normalise(uniques) to the distinct values only and maps back."""
+    codes, uniques = pd.factorize(series)
+    values = np.empty(len(uniques), dtype=object)
+    # Assigned one by one so lists are not broadcast into a 2-D array
+    for i, value in enumerate(normalise(pd.Series(uniques, dtype=object))):
+        values[i] = value
+    out = np.empty(len(series), dtype=object)
+    out[:] = np.nan
+    present = codes >= 0
+    out[present] = values[codes[present]]
+    return pd.Series(out, index=series.index, name=series.name)
+
+
+def canonical_label(values):
+    text = values.astype(str).str.strip()
+    text = text.mask(text.str.lower() == "unknown", "Unknown")
+    return text.mask(text == "", np.nan)
+
+
+def label_list(values):
+    def split(text):
+        names = [name.strip() for name in text.split(",")]
+        names = [UNKNOWN_LABEL if name.lower() in UNKNOWN_TEXT else name for name in names if name]
+        return names or [UNKNOWN_LABEL]
+    return [split(text) for text in values.astype(str)]
+
+
+def issue_rows(mask, column, issue, values, row_offset):
+    rows = np.flatnonzero(mask)
+    return pd.DataFrame({
+        "row": rows + row_offset, "column": column, "issue": issue,
+        "value": values.to_numpy()[rows].astype(str),
+    })
+
+
+def validate(df, row_offset=0):
+    """(canonical df, issues) for a raw export or one chunk of it.
+
+    row_offset numbers the chunk's rows within the whole file. Raises
+    ValueError if required columns are missing.
+    """
+    missing = [col for col in REQUIRED if col not in df.columns]
+    if missing:
+        raise ValueError(f"Export is missing required columns: {', '.join(missing)}")
+
+    issues = []
+    for col, max_score in SCORES.items():
+        if col not in df.columns:
+            continue
+        raw = df[col]
+        scores = pd.to_numeric(raw, errors="coerce")
+        invalid = (scores.isna() & raw.notna()).to_numpy()
+        out_of_range = (scores.notna() & (scores != UNKNOWN_SCORE)
+                        & ((scores < 0) | (scores > max_score) | (scores % 1 != 0))).to_numpy()
+        issues.append(issue_rows(invalid, col, "not a number", raw, row_offset))
+        issues.append(issue_rows(out_of_range, col, f"outside 0-{max_score}", raw, row_offset))
+        df[col] = scores.mask(out_of_range).fillna(UNKNOWN_SCORE).astype("int64")
+
+    for col in LABELS:
+        df[col] = per_value(df[col], canonical_label)
+
+    # Only techniques are required; the other multi-label columns are optional
+    for col in MULTI_LABEL_COLUMNS:
+        if col in df.columns:
+            df[col] = per_value(df[col].fillna(UNKNOWN_LABEL), label_list)
+
+    dates = pd.to_datetime(df[DATE], errors="coerce")
+    issues.append(issue_rows((dates.isna() & df[DATE].notna()).to_numpy(), DATE, "not a date", df[DATE], row_offset))
+    issues.append(issue_rows(df[DATE].isna().to_numpy(), DATE, "missing", df[DATE], row_offset))
+    df[DATE] = dates
+
+    return df, pd.concat(issues, ignore_index=True).sort_values(["row", "column"], ignore_index=True)
+
+
+def summarise(issues):
+    """One line per (column, issue) with its row count, for log messages."""
+    counts = issues.groupby(["column", "issue"]).size()
+    return "; ".join(f"{col}: {count:,} {issue}" for (col, issue), count in counts.items())
@@ -0,0 +1,87 @@
+import hashlib
+import os
+import re
+import shutil
+import tempfile
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: concurrent publishers each clean the export; the first rename wins
+    fcntl = None
+
+from components.data_handler import (
+    CACHE_DIR, CACHE_FORMAT, dataset_version, earlier_exports, load_and_clean_data, load_text_index,
+)
+from components.incident_store import IncidentStore
+
+# ==============================================================================
+# SHARED READ-ONLY STORE
+# ==============================================================================
+# For running several worker processes (e.g. Gunicorn): the cleaned store is
+# written once per version of the export as .npy files, and every worker
+# memory-maps them read-only. The OS page cache then holds one copy of the
+# arrays however many workers there are. Workers starting together take turns
+# on a lock file, so the export is cleaned by the first one only.
+SHARED_DIR = os.path.join(CACHE_DIR, "shared")
+
+
+def shared_path(file_name, version):
+    digest = hashlib.blake2b(f"{CACHE_FORMAT}:{version}".encode(), digest_size=8).hexdigest()
+    return os.path.join(SHARED_DIR, f"{os.path.splitext(file_name)[0]}-{digest}")
+
+
+@contextmanager
+def publish_lock(file_name):
+    os.makedirs(SHARED_DIR, exist_ok=True)
+    with open(os.path.join(SHARED_DIR, f".{os.path.splitext(file_name)[0]}.lock"), "w") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        yield
+
+
+def publish_store(file_name, earlier=None):
+    """Cleans the export and writes its shared store, unless this version of
+    the file is already published. Returns the store directory."""
+    version = dataset_version(file_name)
+    # The store's "Reported Earlier" column depends on the earlier exports too
+    earlier_versions = [dataset_version(name) for name in earlier_exports(file_name, earlier)] if earlier else []
+    path = shared_path(file_name, ":".join([version, *earlier_versions]))
+    if os.path.exists(path):
+        return path
+    with publish_lock(file_name):
+        # Published by another worker while this one waited
+        if os.path.exists(path):
+            return path
+        return write_store(file_name, version, path, earlier)
+
+
+def write_store(file_name, version, path, earlier=None):
+    df, _, _ = load_and_clean_data(file_name, earlier=earlier)
+    tmp = tempfile.mkdtemp(prefix=".tmp-", dir=SHARED_DIR)
+    try:
+        IncidentStore(df, version=version, text_index=load_text_index(file_name, df)).save(tmp)
+        # Directory rename is atomic, so readers never see a partial store
+        os.rename(tmp, path)
+    except OSError:
+        shutil.rmtree(tmp, ignore_errors=True)
+        # Another process published the same version first
+        if not os.path.exists(path):
+            raise
+
+    # Stores of older versions of this file; workers still mapping them keep
+    # their pages until they reload
+    stem = re.escape(os.path.splitext(file_name)[0])
+    for name in os.listdir(SHARED_DIR):
+        old = os.path.join(SHARED_DIR, name)
+        if re.fullmatch(rf"{stem}-[0-9a-f]{{16}}", name) and old != path:
+            shutil.rmtree(old, ignore_errors=True)
+    return path
+
+
+def shared_store(file_name, earlier=None):
+    """Loader with the same return shape as load_and_clean_data, but giving a
+    memory-mapped IncidentStore instead of the frame."""
+    month_name = os.path.splitext(file_name)[0].capitalize()
+    store = IncidentStore.load(publish_store(file_name, earlier))
+    return store, store.total_records, month_name
@@ -0,0 +1,44 @@
+import json
+import os
+import tempfile
+
+import plotly.io as pio
+
+# ==============================================================================
+# PAGE SNAPSHOT
+# ==============================================================================
+# Everything a freshly opened page shows, taken from the last export that
+# loaded: dropdown options, summary cards, date bounds and the unfiltered
+# figures. It is written after every successful load and read at startup, so
+# pages can be served at once from it while the export itself still loads.
+SNAPSHOT_FORMAT = 1
+
+
+def figure_json(fig):
+    """Plain JSON data of a figure, as the snapshot file and dcc.Graph hold it."""
+    return json.loads(pio.to_json(fig, validate=False))
+
+
+def write_snapshot(path, state):
+    """Writes state (JSON data) atomically, so readers see the old or the new file."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix=".tmp-", dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump({"format": SNAPSHOT_FORMAT, **state}, f)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def read_snapshot(path):
+    """The state written by write_snapshot, or None if there is no usable one."""
+    try:
+        with open(path) as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if state.pop("format", None) != SNAPSHOT_FORMAT:
+        return None
+    return state
@@ -0,0 +1,155 @@
+import json
+import os
+import re
+from itertools import chain
+
+import numpy as np
+import pandas as pd
+
+# ==============================================================================
+# FULL-TEXT INDEX
+# ==============================================================================
+# Inverted index over the free-text columns. Terms are sorted, and each term's
+# posting list (the incidents containing it, ascending) is a slice of one
+# concatenated array, CSR style:
+#   rows[indptr[t]:indptr[t + 1]]
+# A keyword query is a binary search per term plus sorted-array intersections,
+# so it never touches the text itself.
+TEXT_COLUMNS = ["Title (Company)", "Description"]
+TAG = re.compile(r"<[^>]*>")
+# Longer words (URLs, hashes) are split into 32-character terms, in queries
+# too, so the fixed-width term array stays small
+WORD = re.compile(r"[^\W_]{1,32}")
+FILES = ("terms", "indptr", "rows")
+# Texts tokenised per block by word_codes, which bounds the word strings held at once
+TEXT_BLOCK = 20_000
+
+
+def tokenize(text):
+    if "<" in text:
+        text = TAG.sub(" ", text)
+    return WORD.findall(text.lower())
+
+
+def word_codes(texts, vocabulary=None):
+    """(words per text, word ids, words) for a sequence of texts; ids number
+    the words in order of first appearance, and non-strings have no words.
+
+    Texts are tokenised TEXT_BLOCK at a time, so only one block's word strings
+    are held at once. Pass the same vocabulary dict to number several
+    sequences with shared ids.
+    """
+    vocabulary = {} if vocabulary is None else vocabulary
+    lengths, word_ids = [np.empty(0, dtype=np.int64)], [np.empty(0, dtype=np.int64)]
+    for lo in range(0, len(texts), TEXT_BLOCK):
+        tokens = [tokenize(text) if isinstance(text, str) else [] for text in texts[lo:lo + TEXT_BLOCK]]
+        lengths.append(np.fromiter(map(len, tokens), dtype=np.int64, count=len(tokens)))
+        codes, words = pd.factorize(np.array(list(chain.from_iterable(tokens)), dtype=object))
+        ids = np.fromiter((vocabulary.setdefault(word, len(vocabulary)) for word in words),
+                          dtype=np.int64, count=len(words))
+        word_ids.append(ids[codes])
+    return np.concatenate(lengths), np.concatenate(word_ids), list(vocabulary)
+
+
+def parse_query(query):
+    """(term, is_prefix) pairs; a trailing * matches every term starting with it."""
+    terms = []
+    for word in str(query or "").split():
+        prefix = word.endswith("*")
+        terms += [(term, False) for term in tokenize(word)]
+        if prefix and terms:
+            terms[-1] = (terms[-1][0], True)
+    return tuple(terms)
+
+
+class TextIndex:
+    def __init__(self, terms, indptr, rows, n_rows):
+        self.terms = terms
+        self.indptr = indptr
+        self.rows = rows
+        self.n_rows = n_rows
+
+    @classmethod
+    def from_frame(cls, df, columns=TEXT_COLUMNS):
+        """Index over the columns of df that exist; None if there are none."""
+        columns = [col for col in columns if col in df.columns]
+        if not columns:
+            return None
+        vocabulary, row_parts, term_parts = {}, [], []
+        for col in columns:
+            # Tokenised once per distinct text; titles in particular repeat a lot
+            codes, texts = pd.factorize(df[col].to_numpy(dtype=object))
+            lengths, word_ids, _ = word_codes(texts, vocabulary)
+            present = np.flatnonzero(codes >= 0)
+            per_row = lengths[codes[present]]
+            row_parts.append(np.repeat(present, per_row))
+            # Positions of each row's words inside the word ids of all texts
+            starts = (np.cumsum(lengths) - lengths)[codes[present]]
+            offsets = np.arange(per_row.sum()) - np.repeat(np.cumsum(per_row) - per_row, per_row)
+            term_parts.append(word_ids[np.repeat(starts, per_row) + offsets])
+
+        # Only integer ids are repeated per row; each term string exists once
+        term_codes = np.concatenate(term_parts)
+        terms = np.asarray(list(vocabulary), dtype=str)
+        order = np.argsort(terms, kind="stable")
+        rank = np.empty(len(order), dtype=np.int64)
+        rank[order] = np.arange(len(order))
+        # One key per (term, row), sorted by term, then row
+        n_rows = max(len(df), 1)
+        keys = np.sort(rank[term_codes] * n_rows + np.concatenate(row_parts))
+        keys = keys[np.diff(keys, prepend=-1) != 0]
+        indptr = np.concatenate([[0], np.cumsum(np.bincount(keys // n_rows, minlength=len(order)))])
+        return cls(terms[order], indptr, (keys % n_rows).astype(np.int32), len(df))
+
+    def postings(self, term, prefix=False):
+        lo = np.searchsorted(self.terms, term, side="left")
+        if prefix:
+            hi = np.searchsorted(self.terms, term + "\uffff", side="left")
+        else:
+            hi = lo + 1 if lo < len(self.terms) and self.terms[lo] == term else lo
+        rows = self.rows[self.indptr[lo]:self.indptr[hi]]
+        if hi - lo <= 1:
+            return rows
+        # A prefix spans several posting lists; marking rows merges them without a sort
+        marked = np.zeros(self.n_rows, dtype=bool)
+        marked[rows] = True
+        return np.flatnonzero(marked)
+
+    def search(self, query):
+        """Sorted row positions containing every query term, or None for an empty query."""
+        terms = parse_query(query)
+        if not terms:
+            return None
+        postings = sorted((self.postings(term, prefix) for term, prefix in terms), key=len)
+        rows = np.asarray(postings[0])
+        for other in postings[1:]:
+            if not len(rows):
+                break
+            if len(other) == self.n_rows:  # a term in every incident filters nothing
+                continue
+            marked = np.zeros(self.n_rows, dtype=bool)
+            marked[other] = True
+            rows = rows[marked[rows]]
+        return rows
+
+    def save(self, path, prefix="search-"):
+        """Writes the arrays into the existing directory path as .npy files."""
+        for name in FILES:
+            tmp = os.path.join(path, f"{prefix}{name}.tmp")
+            with open(tmp, "wb") as f:
+                np.save(f, getattr(self, name))
+            # Replaced rather than overwritten, so processes mapping the old file keep it intact
+            os.replace(tmp, os.path.join(path, f"{prefix}{name}.npy"))
+        with open(os.path.join(path, f"{prefix}manifest.json"), "w") as f:
+            json.dump({"n_rows": self.n_rows}, f)
+
+    @classmethod
+    def load(cls, path, prefix="search-"):
+        """Index over the memory-mapped arrays written by save(), or None if there are none."""
+        try:
+            with open(os.path.join(path, f"{prefix}manifest.json")) as f:
+                manifest = json.load(f)
+            arrays = [np.load(os.path.join(path, f"{prefix}{name}.npy"), mmap_mode="r") for name in FILES]
+        except (OSError, ValueError):
+            return None
+        return cls(*arrays, manifest["n_rows"])
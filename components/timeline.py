@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+
+# ==============================================================================
+# ROLLING-WINDOW TREND COUNTS
+# ==============================================================================
+DATE_COLUMN = "Incident Date"
+
+
+class Timeline:
+    """Daily counts of a date-keyed cube, per series (one series per
+    combination of the other dimensions), kept as cumulative sums over a dense
+    day axis.
+
+    The total of any window is the difference of two rows, so daily, weekly or
+    monthly buckets over a date range cost O(buckets x series) no matter how
+    many years of history the export covers.
+    """
+
+    def __init__(self, cells):
+        dims = [col for col in cells.columns if col not in (DATE_COLUMN, "count")]
+        dates = pd.DatetimeIndex(np.asarray(cells[DATE_COLUMN], dtype="datetime64[ns]"))
+        cells = cells[dates.notna()]
+        dates = dates[dates.notna()]
+
+        codes = cells.groupby(dims, observed=True, dropna=False, sort=False).ngroup().to_numpy()
+        first_rows = np.unique(codes, return_index=True)[1]
+        self.series = cells[dims].iloc[first_rows].reset_index(drop=True)
+
+        self.days = pd.date_range(dates.min(), dates.max(), freq="D") if len(dates) else pd.DatetimeIndex([])
+        daily = np.zeros((len(self.days), len(self.series)), dtype=np.int64)
+        if len(dates):
+            np.add.at(daily, ((dates - self.days[0]).days, codes), cells["count"].to_numpy())
+        # Row i holds the totals of all days before day i
+        self.cumulative = np.vstack([np.zeros((1, len(self.series)), dtype=np.int64), daily.cumsum(axis=0)])
+
+    def date_range(self):
+        """(first day, last day) with incidents, or (None, None)."""
+        if not len(self.days):
+            return None, None
+        return self.days[0], self.days[-1]
+
+    def counts(self, filters, by, start=None, end=None, freq="W", name="Count"):
+        """Incident counts per `freq` period ("D", "W" or "M") and value of `by`,
+        within [start, end]. Periods cut by the range only count the days inside it."""
+        keep = np.ones(len(self.series), dtype=bool)
+        for col, values in filters.items():
+            if values:
+                keep &= self.series[col].isin(values).to_numpy()
+        lo = 0 if start is None else self.days.searchsorted(pd.Timestamp(start))
+        hi = len(self.days) if end is None else self.days.searchsorted(pd.Timestamp(end), side="right")
+        if hi <= lo or not keep.any():
+            return pd.DataFrame({DATE_COLUMN: pd.DatetimeIndex([]), by: [], name: np.array([], dtype=np.int64)})
+
+        # Bucket boundaries are the first day of each period within the range
+        periods = self.days[lo:hi].to_period(freq)
+        starts = np.flatnonzero(np.r_[True, periods[1:] != periods[:-1]])
+        edges = np.r_[starts + lo, hi]
+        window = self.cumulative[edges[1:]][:, keep] - self.cumulative[edges[:-1]][:, keep]
+
+        group_codes, groups = pd.factorize(self.series.loc[keep, by], use_na_sentinel=False)
+        totals = window @ np.eye(len(groups), dtype=np.int64)[group_codes]
+        return pd.DataFrame({
+            DATE_COLUMN: np.repeat(periods[starts].start_time, len(groups)),
+            by: np.tile(np.asarray(groups, dtype=object), len(starts)),
+            name: totals.ravel(),
+        })
@@ -1,21 +1,78 @@
+import os
+from collections import defaultdict
 import pandas as pd
 import plotly.express as px
-from dash import Dash, dcc, html, Input, Output, callback
+from dash import Dash, dcc, html, callback, Input, Output, State
+from dash.exceptions import PreventUpdate
 import plotly.graph_objects as go
 import numpy as np
-from components.data_handler import load_and_clean_data, get_sophistication_signal, format_combo
-from components.graph_actor import create_main_bar, create_network_graph
-from components.graph_motiv_asset import motiv_asset
-from components.graph_heatmap import heatmap
-from components.graph_actor_protection import actor_protection
-from components.graph_tech_sensitivity import tech_sensitivity
-from components.graph_motiv_exposure import motiv_exposure
-from components.graph_tech_sophistication import sophistication_bar,tech_combination
+from components.data_handler import load_and_clean_data, load_text_index, stream_aggregates, dataset_version, CACHE_DIR
+from components.graph_actor import create_main_bar, create_network_graph, main_bar_series
+from components.graph_motiv_asset import motiv_asset, motiv_asset_series
+from components.graph_heatmap import heatmap, heatmap_series
+from components.graph_actor_protection import actor_protection, actor_protection_series
+from components.graph_tech_sensitivity import tech_sensitivity, tech_sensitivity_series
+from components.graph_motiv_exposure import motiv_exposure, motiv_exposure_series
+from components.graph_tech_sophistication import sophistication_bar,tech_combination, sophistication_series, combination_series
+from components.graph_trend import trend_line, GRANULARITIES, TREND_DIMENSIONS
+from components.graph_label_pairs import label_heatmap, label_network, PAIR_DIMENSIONS, PAIR_METRICS
+from components.figure_cache import FigureCache
+from components.incident_store import EARLIER_COLUMN, IncidentStore
+from components.text_index import TEXT_COLUMNS
+from components.live_dataset import LiveDataset
+from components.shared_store import shared_store
+from components.registry import (register_figure, register_series, register_callbacks, background_manager,
+                                 initial_values, initial_figures)
+from components.snapshot import figure_json, read_snapshot, write_snapshot
+from components import health, metrics, query_api
 
 # ==============================================================================
 # 1. CONFIGURATION & CONSTANTS
 # ==============================================================================
-FILE_NAME = "incidents-export-2026-02-01-22-09-03.csv"
+# DASHBOARD_FILE overrides the export to load (e.g. for benchmarks)
+FILE_NAME = os.environ.get("DASHBOARD_FILE", "incidents-export-2026-02-01-22-09-03.csv")
+
+# Built figures kept per filter combination (LRU, bounded by count and size)
+FIGURE_CACHE_ENTRIES = 256
+FIGURE_CACHE_BYTES = 64 * 1024 * 1024
+
+# Number of strongest actor-technique pairs drawn in the network graph
+NETWORK_TOP_N = 10
+# Number of strongest label pairs (by lift) drawn in the co-occurrence network
+PAIR_NETWORK_TOP_N = 15
+
+# Set to a row count to aggregate the export in chunks of that size instead of
+# loading it whole; for archives larger than memory
+STREAMING_CHUNK_SIZE = None
+
+# After the first render, answer filter changes with only the new trace data
+# (a Patch) instead of whole figures; for analysts on slow connections.
+# Trace colours then stay fixed to the unfiltered figure's.
+LEAN_UPDATES = False
+
+# Build the network, combination and technique-sensitivity graphs in worker
+# processes (needs dash[diskcache]), so one slow graph does not hold up other
+# users. Results are cached on disk per dataset version.
+BACKGROUND_CALLBACKS = False
+
+# Map the cleaned arrays from data/.cache/shared/ instead of holding a private
+# copy, so several worker processes (see gunicorn.conf.py) share one in RAM
+SHARED_STORE = os.environ.get("DASHBOARD_SHARED_STORE") == "1"
+
+# Watch data/ for new or rewritten exports matching EXPORT_PATTERN and swap
+# them in without a restart; open pages pick them up on their next poll.
+# "Count each incident once" also drops incidents already in older exports
+# matching EXPORT_PATTERN.
+HOT_RELOAD = True
+RELOAD_POLL_SECONDS = 5
+EXPORT_PATTERN = "incidents-export-*.csv"
+
+# Set by scripts that only build figures from an export (reports/render.py):
+# no hot reload, no snapshot.json written for the live app's pages
+OFFLINE = os.environ.get("DASHBOARD_OFFLINE") == "1"
+
+# Directory for per-request profiles of pages opened with ?profile=1; off when unset
+PROFILE_DIR = os.environ.get("DASHBOARD_PROFILE_DIR")
 
 PROFESSIONAL_COLORS = [
     "#2563eb", "#1e3a8a", "#64748b", "#16a34a", "#f59e0b", "#dc2626",
@@ -29,279 +86,556 @@ ACCESSIBLE_PALETTE = [
 ]
 
 # =================================================================
-# --- INITIAL LOAD ---
+# --- DATA LOADING ---
 # =================================================================
-df, df_exploded, total_records, month_name = load_and_clean_data(FILE_NAME)
-# Sophistication Logic
-df["Sophistication_Category"] = df["Techniques Used"].apply(get_sophistication_signal)
-
-# Unique values for Dropdowns
-motivations = sorted(df["Root Cause (Why)"].fillna("Unknown").unique())
-exposure_levels = sorted(
-    df["Data exposure score"]
-    .fillna(-1)
-    .astype(str)
-    .replace("-1.0", "Unknown")
-    .replace("-1", "Unknown")
-    .unique()
-)
+def load_dataset(file_name):
+    if STREAMING_CHUNK_SIZE:
+        # Aggregate-only store: the export is never held in memory as a whole
+        cubes, total_records, month_name = stream_aggregates(file_name, STREAMING_CHUNK_SIZE)
+        store = IncidentStore.from_cubes(cubes, version=dataset_version(file_name))
+    elif SHARED_STORE:
+        # Read-only arrays backed by files in the OS page cache, shared across workers
+        store, total_records, month_name = shared_store(file_name, earlier=EXPORT_PATTERN)
+    else:
+        # Incidents also in an earlier export are marked, for "Count each incident once"
+        df, total_records, month_name = load_and_clean_data(file_name, earlier=EXPORT_PATTERN)
+        # Categorical store with precomputed filter bitmaps, shared by every graph
+        store = IncidentStore(df, version=dataset_version(file_name), text_index=load_text_index(file_name, df))
+    return store, total_records, month_name
+
+# Current export; replaced as a whole when a new one is loaded. It is loaded in
+# a background thread started by the first request (or by gunicorn's
+# post_fork), so the server answers at once however large the export is
+dataset = LiveDataset(load_dataset, FILE_NAME, EXPORT_PATTERN, RELOAD_POLL_SECONDS, watch=HOT_RELOAD and not OFFLINE)
+
+# Unique values for Dropdowns, keyed by dropdown id
+def dropdown_values(store):
+    techniques = store.values("Techniques Used", cube="techniques")
+    threat_actor_counts = (store.counts({}, ["Threat Actor"])
+                           .sort_values("Count", ascending=False, kind="stable")
+                           .head(15)["Threat Actor"].astype(str).tolist())
+    return {
+        "threat-actor-filter": threat_actor_counts,
+        "technique-filter": ["Unknown"] + techniques,
+        "root-cause-filter": store.values("Root Cause (Why)"),
+        "asset-type-filter": store.values("Asset Type"),
+        "s4-actor-filter": threat_actor_counts,
+        "s4-protection-filter": store.values("Data Protection State"),
+        "sensitivity-score-filter": store.values("Sensitivity_Label", cube="techniques"),
+        "section5-technique-filter": ["Unknown"] + techniques,
+        "rose-motivation-filter": store.values("Motivation"),
+        "rose-exposure-filter": store.values("Exposure Label"),
+        "trend-actor-filter": threat_actor_counts,
+        "pairs-actor-filter": threat_actor_counts,
+    }
 
-techniques = sorted(df_exploded["Techniques Used"].dropna().unique())
-threat_actor_counts = df["Threat Actor"].value_counts().head(15).index.tolist()
-root_causes = sorted(df["Root Cause (Why)"].dropna().unique())
-asset_types = sorted(df["Asset Type"].dropna().unique())
-protection_states = sorted(df["Data Protection State"].unique())
-sensitivity_options = sorted(df_exploded["Sensitivity_Label"].unique())
+def dropdown_options(store):
+    return {dropdown_id: [{"label": v, "value": v} for v in values]
+            for dropdown_id, values in dropdown_values(store).items()}
+
+def trend_date_bounds(store):
+    # ISO dates for the trend date picker, or None when no date could be parsed
+    return [day and day.date().isoformat() for day in store.timeline().date_range()]
+
+# =================================================================
+# --- PAGE STATE ---
+# =================================================================
+# What the layout takes from the data, figures included (see
+# components/snapshot.py). Until this process has loaded an export, pages are
+# served from the snapshot of the last one loaded, or empty if there is none,
+# and switch to the live data on their next poll.
+SNAPSHOT_PATH = os.path.join(CACHE_DIR, "snapshot.json")
+EMPTY_PAGE = {
+    "version": None, "total_records": None, "month_name": "Loading…", "options": {},
+    "date_bounds": [None, None], "search": False, "unique": False, "figures": {},
+}
+saved_page = read_snapshot(SNAPSHOT_PATH) or EMPTY_PAGE
+# Rendered by publish_page from the data loaded in this process
+live_page = None
+
+def page_state(data):
+    store = data.store
+    figures = initial_figures(initial_values(build_layout(EMPTY_PAGE)))
+    return {
+        "version": data.version, "total_records": data.total_records, "month_name": data.month_name,
+        "options": dropdown_options(store), "date_bounds": trend_date_bounds(store),
+        "search": store.text_index is not None, "unique": store.has_duplicates,
+        "figures": {output_id: figure_json(fig) for output_id, fig in figures.items()},
+    }
+
+def publish_page(data):
+    """Runs after every load: renders the new page state and saves it as the snapshot."""
+    global live_page
+    live_page = page_state(data)
+    write_snapshot(SNAPSHOT_PATH, live_page)
+
+if not OFFLINE:
+    dataset.on_load = publish_page
 
 # ==============================================================================
 # 5. APP INITIALIZATION & LAYOUT
 # ==============================================================================
 app = Dash(__name__)
+# WSGI entry point: gunicorn -c gunicorn.conf.py dashboard:server
+server = app.server
+# Any request (a health check included) starts loading the data in this process
+if not OFFLINE:
+    server.before_request(dataset.start)
 
-app.layout = html.Div([
-    # --- HEADER ---
-    html.Div([
-        html.H1("Incident Analysis Dashboard", className="header"),
-        html.P("Comprehensive analysis of cyber security incidents and risk matrices.", className="header-description"),
-    ]),
-    # =================================================================
-    # SUMMARY CARDS 
-    # =================================================================
-    html.Div([
+def build_layout(state, version=None):
+    """The page for a page state; version is None while the state is not
+    (yet) the live data's, which makes the page poll until it is."""
+    options = defaultdict(list, state["options"])
+    first_day, last_day = state["date_bounds"]
+    total_records = state["total_records"]
+    layout = html.Div([
+        # Version of the data this page shows; changing it redraws every graph
+        dcc.Store(id="dataset-version", data=version),
+        dcc.Interval(id="dataset-poll", interval=RELOAD_POLL_SECONDS * 1000,
+                     disabled=not HOT_RELOAD and version is not None),
+        # --- HEADER ---
+        html.Div([
+            html.H1("Incident Analysis Dashboard", className="header"),
+            html.P("Comprehensive analysis of cyber security incidents and risk matrices.", className="header-description"),
+            html.P("Loading the latest data…" if version is None else "", id="data-status",
+                   className="section-description"),
+        ]),
+        # =================================================================
+        # SUMMARY CARDS 
+        # =================================================================
         html.Div([
-            html.H3(f"{total_records:,}", className="summary-main"),
-            html.P("Total Records Analyzed", className="summary-sub ")
-        ], className="summary-card"),
+            html.Div([
+                html.H3(f"{total_records:,}" if total_records is not None else "…", id="summary-total-records", className="summary-main"),
+                html.P("Total Records Analyzed", className="summary-sub ")
+            ], className="summary-card"),
         
+            html.Div([
+                html.H3(state["month_name"], id="summary-period", className="summary-main"),
+                html.P("Reporting Period", className="summary-sub")
+            ], className="summary-card"),
+        ], className="summary"),
+        # =================================================================
+        # --- SEARCH: narrows every graph below ---
+        # =================================================================
         html.Div([
-            html.H3(month_name, className="summary-main"),
-            html.P("Reporting Period", className="summary-sub")
-        ], className="summary-card"),
-    ], className="summary"),
-    # =================================================================
-    # --- SECTION 1: Threat Actor & Techniques ---
-    # =================================================================
-    html.Div([
-        html.H2("Threat Actor vs Techniques", className="section-title"),
+            html.Label("Search incident titles and descriptions", style={'fontWeight': 'bold'}),
+            dcc.Input(
+                id="incident-search", type="search", debounce=True, value="",
+                placeholder="Keywords, all must match; end one with * to match by prefix (e.g. ransom*)",
+                disabled=not state["search"], style={'width': '100%'}
+            ),
+            dcc.Checklist(
+                id="unique-incidents", value=[],
+                options=[{"label": " Count each incident once (near-duplicates merged, also with earlier exports)", "value": "unique",
+                          "disabled": not state["unique"]}],
+                inputStyle={'marginRight': '4px'}
+            ),
+            html.P(id="search-summary", className="section-description"),
+        ], className="section"),
+        # =================================================================
+        # --- SECTION 1: Threat Actor & Techniques ---
+        # =================================================================
         html.Div([
+            html.H2("Threat Actor vs Techniques", className="section-title"),
             html.Div([
-                html.Label("Filter by Threat Actor", style={'fontWeight': 'bold'}),
-                dcc.Dropdown(
-                    id="threat-actor-filter",
-                    options=[{"label": ta, "value": ta} for ta in threat_actor_counts],
-                    value=None, multi=True, placeholder="All Threat Actors"
-                )
-            ], className="dropdown-left"),
+                html.Div([
+                    html.Label("Filter by Threat Actor", style={'fontWeight': 'bold'}),
+                    dcc.Dropdown(
+                        id="threat-actor-filter",
+                        options=options["threat-actor-filter"],
+                        value=None, multi=True, placeholder="All Threat Actors"
+                    )
+                ], className="dropdown-left"),
 
-            html.Div([
-                html.Label("Filter by Technique", style={'fontWeight': 'bold'}),
-                dcc.Dropdown(
-                    id="technique-filter",
-                    options=[{"label": "Unknown", "value": "Unknown"}] + [{"label": t, "value": t} for t in techniques],
-                    value=None, multi=True, searchable=True, placeholder="Search & select techniques"
-                )
-            ], className="dropdown-right"),
-        ], className="dropdown-container"),
-        dcc.Graph(id="main-viz", style={'height': '500px'}),
-    ], className="section"),
+                html.Div([
+                    html.Label("Filter by Technique", style={'fontWeight': 'bold'}),
+                    dcc.Dropdown(
+                        id="technique-filter",
+                        options=options["technique-filter"],
+                        value=None, multi=True, searchable=True, placeholder="Search & select techniques"
+                    )
+                ], className="dropdown-right"),
+            ], className="dropdown-container"),
+            dcc.Graph(id="main-viz", style={'height': '500px'}),
+        ], className="section"),
     
-    # --- SECTION: Network Graph ---
-
-    html.Div([
-        html.H2("Threat Actor & Technique Network", className="section-title"),
-        html.P("Visualizing the top 10 relationships between actors and their methods.", className="section-description"),
-        dcc.Graph(id='network-graph')
-    ], className="section network-container"),
-
-    # =================================================================
-    # --- SECTION 2: Motivation & Asset Type ---
-    # =================================================================
-    html.Div([
-        html.H2("Assets Impacted by Motivation", className="section-title"),
+        # --- SECTION: Network Graph ---
+
         html.Div([
-            html.Div([
-                html.Label("Motivation", style={'fontWeight': 'bold'}),
-                dcc.Dropdown(
-                    id="root-cause-filter",
-                    options=[{"label": rc, "value": rc} for rc in root_causes],
-                    value=None, multi=True, placeholder="All Root Causes"
-                )
-            ], className="dropdown-left"),
+            html.H2("Threat Actor & Technique Network", className="section-title"),
+            html.P(f"Visualizing the top {NETWORK_TOP_N} relationships between actors and their methods.", className="section-description"),
+            dcc.Graph(id='network-graph')
+        ], className="section network-container"),
 
-            html.Div([
-                html.Label("Asset Type", style={'fontWeight': 'bold'}),
-                dcc.Dropdown(
-                    id="asset-type-filter",
-                    options=[{"label": at, "value": at} for at in asset_types],
-                    value=None, multi=True, placeholder="All Asset Types"
-                )
-            ], className="dropdown-right"),
-        ], className="dropdown-container"),
-        dcc.Graph(id="root-asset-viz", style={'height': '500px'}),
-    ], className="section"),
-    # =================================================================
-    # --- SECTION 3: Heatmap ---
-    # =================================================================
-    html.Div([
-        html.H2("Risk Matrix: Protection vs Sensitivity", className="section-title"),
-        dcc.Graph(id="protection-sensitivity-heatmap", style={'height':'500px'})
-    ], className="section"),
-
-    # =================================================================
-    # --- SECTION 4: Actor vs Protection ---
-    # =================================================================
-    html.Div([
-        html.H2("Threat Actor and Data Protection State Analysis", className="section-title"),
+        # =================================================================
+        # --- SECTION 2: Motivation & Asset Type ---
+        # =================================================================
         html.Div([
+            html.H2("Assets Impacted by Motivation", className="section-title"),
             html.Div([
-                html.Label("Filter by Threat Actor", style={'fontWeight': 'bold'}),
-                dcc.Dropdown(
-                    id="s4-actor-filter",
-                    options=[{"label": ta, "value": ta} for ta in threat_actor_counts],
-                    multi=True, placeholder="All Threat Actors"
-                )
-            ], className="dropdown-left"),
+                html.Div([
+                    html.Label("Motivation", style={'fontWeight': 'bold'}),
+                    dcc.Dropdown(
+                        id="root-cause-filter",
+                        options=options["root-cause-filter"],
+                        value=None, multi=True, placeholder="All Root Causes"
+                    )
+                ], className="dropdown-left"),
+
+                html.Div([
+                    html.Label("Asset Type", style={'fontWeight': 'bold'}),
+                    dcc.Dropdown(
+                        id="asset-type-filter",
+                        options=options["asset-type-filter"],
+                        value=None, multi=True, placeholder="All Asset Types"
+                    )
+                ], className="dropdown-right"),
+            ], className="dropdown-container"),
+            dcc.Graph(id="root-asset-viz", style={'height': '500px'}),
+        ], className="section"),
+        # =================================================================
+        # --- SECTION 3: Heatmap ---
+        # =================================================================
+        html.Div([
+            html.H2("Risk Matrix: Protection vs Sensitivity", className="section-title"),
+            dcc.Graph(id="protection-sensitivity-heatmap", style={'height':'500px'})
+        ], className="section"),
 
+        # =================================================================
+        # --- SECTION 4: Actor vs Protection ---
+        # =================================================================
+        html.Div([
+            html.H2("Threat Actor and Data Protection State Analysis", className="section-title"),
             html.Div([
-                html.Label("Filter by Protection State", style={'fontWeight': 'bold'}),
-                dcc.Dropdown(
-                    id="s4-protection-filter",
-                    options=[{"label": ps, "value": ps} for ps in protection_states],
-                    multi=True, placeholder="All Protection States"
-                )
-            ], className="dropdown-right"),
-        ], className="dropdown-container"),
-        dcc.Graph(id="actor-protection-viz", style={'height': '500px'}),
-    ], className="section"),
-    # =================================================================
-    # --- SECTION 5: Technique Distribution ---
-    # =================================================================
-    html.Div([
-        html.H2("Technique & Sensitivity Distribution", className="section-title"),
+                html.Div([
+                    html.Label("Filter by Threat Actor", style={'fontWeight': 'bold'}),
+                    dcc.Dropdown(
+                        id="s4-actor-filter",
+                        options=options["s4-actor-filter"],
+                        multi=True, placeholder="All Threat Actors"
+                    )
+                ], className="dropdown-left"),
+
+                html.Div([
+                    html.Label("Filter by Protection State", style={'fontWeight': 'bold'}),
+                    dcc.Dropdown(
+                        id="s4-protection-filter",
+                        options=options["s4-protection-filter"],
+                        multi=True, placeholder="All Protection States"
+                    )
+                ], className="dropdown-right"),
+            ], className="dropdown-container"),
+            dcc.Graph(id="actor-protection-viz", style={'height': '500px'}),
+        ], className="section"),
+        # =================================================================
+        # --- SECTION 5: Technique Distribution ---
+        # =================================================================
         html.Div([
+            html.H2("Technique & Sensitivity Distribution", className="section-title"),
             html.Div([
-                html.Label("Filter by Sensitivity Score", style={'fontWeight': 'bold'}),
-                dcc.Dropdown(
-                    id='sensitivity-score-filter',
-                    options=[{'label': i, 'value': i} for i in sensitivity_options],
-                    multi=True, placeholder="All Sensitivity Scores"
-                )
-            ], className="dropdown-left"), 
+                html.Div([
+                    html.Label("Filter by Sensitivity Score", style={'fontWeight': 'bold'}),
+                    dcc.Dropdown(
+                        id='sensitivity-score-filter',
+                        options=options["sensitivity-score-filter"],
+                        multi=True, placeholder="All Sensitivity Scores"
+                    )
+                ], className="dropdown-left"), 
 
+                html.Div([
+                    html.Label("Filter by Technique", style={'fontWeight': 'bold'}),
+                    dcc.Dropdown(
+                        id="section5-technique-filter",
+                        options=options["section5-technique-filter"],
+                        value=None, multi=True, searchable=True, placeholder="Search & select techniques"
+                    )
+                ], className="dropdown-right"),
+            ], className="dropdown-container"),
+            dcc.Graph(id="tech-sens-distribution-bar", style={'height': '500px'})
+        ], className="section"),
+        # =================================================================
+        # --- SECTION 6: Rose Plot ---
+        # =================================================================
+        html.Div([
+            html.H2("Data Exposure Levels by Attack Motivation", className="section-title"),
+            html.P("Radius represents incident volume. Segments show the breakdown of exposure scores.", className="section-title-description"),
             html.Div([
-                html.Label("Filter by Technique", style={'fontWeight': 'bold'}),
-                dcc.Dropdown(
-                    id="section5-technique-filter",
-                    options=[{"label": "Unknown", "value": "Unknown"}] + [{"label": t, "value": t} for t in techniques],
-                    value=None, multi=True, searchable=True, placeholder="Search & select techniques"
-                )
-            ], className="dropdown-right"),
-        ], className="dropdown-container"),
-        dcc.Graph(id="tech-sens-distribution-bar", style={'height': '500px'})
-    ], className="section"),
-    # =================================================================
-    # --- SECTION 6: Rose Plot ---
-    # =================================================================
-    html.Div([
-        html.H2("Data Exposure Levels by Attack Motivation", className="section-title"),
-        html.P("Radius represents incident volume. Segments show the breakdown of exposure scores.", className="section-title-description"),
+                html.Div([
+                    html.Label("Filter by Motivation", style={'fontWeight': 'bold'}),
+                    dcc.Dropdown(
+                        id="rose-motivation-filter",
+                        options=options["rose-motivation-filter"],
+                        multi=True, searchable=True, placeholder="All Motivations"
+                    )
+                ], className="dropdown-left"),
+
+                html.Div([
+                    html.Label("Filter by Exposure Level", style={'fontWeight': 'bold'}),
+                    dcc.Dropdown(
+                        id="rose-exposure-filter",
+                        options=options["rose-exposure-filter"],
+                        multi=True, placeholder="All Exposure Levels"
+                    )
+                ], className="dropdown-right"),
+            ], className="dropdown-container"),
+            dcc.Graph(id="motivation-exposure-rose", style={'height': '600px'})
+        ], className="section"),
+        # =================================================================
+        # --- SECTION 7: Attacker Sophistication ---
+        # =================================================================
+        html.Div([
+            html.H2("Attacker Techniques", className="section-title"),
+            html.P("Distribution of technique density based on their combination of usage", className="section-title-description"),
+            dcc.Graph(id="sophistication-bar-viz", style={'height': '450px'}),
+            dcc.Graph(id="technique-combinations-viz", style={'height': '500px'})
+        ], className="section"),
+        # =================================================================
+        # --- SECTION 8: Incident Trends ---
+        # =================================================================
         html.Div([
+            html.H2("Incident Trends", className="section-title"),
+            html.P("Incidents over time by date of occurrence. Incidents without a readable date are left out.", className="section-title-description"),
             html.Div([
-                html.Label("Filter by Motivation", style={'fontWeight': 'bold'}),
-                dcc.Dropdown(
-                    id="rose-motivation-filter",
-                    options=[{"label": m, "value": m} for m in motivations],
-                    multi=True, searchable=True, placeholder="All Motivations"
-                )
-            ], className="dropdown-left"),
+                html.Div([
+                    html.Label("Split by", style={'fontWeight': 'bold'}),
+                    dcc.RadioItems(
+                        id="trend-group-by",
+                        options=[{"label": " " + by, "value": by} for by in TREND_DIMENSIONS],
+                        value="Threat Actor", inline=True
+                    ),
+                    html.Label("Granularity", style={'fontWeight': 'bold'}),
+                    dcc.RadioItems(
+                        id="trend-granularity",
+                        options=[{"label": " " + label, "value": freq} for freq, label in GRANULARITIES.items()],
+                        value="W", inline=True
+                    ),
+                ], className="dropdown-left"),
 
+                html.Div([
+                    html.Label("Date Range", style={'fontWeight': 'bold'}),
+                    dcc.DatePickerRange(
+                        id="trend-dates",
+                        min_date_allowed=first_day, max_date_allowed=last_day,
+                        initial_visible_month=last_day, clearable=True
+                    ),
+                    html.Label("Filter by Threat Actor", style={'fontWeight': 'bold'}),
+                    dcc.Dropdown(
+                        id="trend-actor-filter",
+                        options=options["trend-actor-filter"],
+                        multi=True, placeholder="All Threat Actors"
+                    )
+                ], className="dropdown-right"),
+            ], className="dropdown-container"),
+            dcc.Graph(id="trend-viz", style={'height': '500px'})
+        ], className="section"),
+        # =================================================================
+        # --- SECTION 9: Label Co-occurrence ---
+        # =================================================================
+        html.Div([
+            html.H2("Which Labels Occur Together", className="section-title"),
+            html.P("Incidents listing both labels, and their lift: how much more often two labels occur together "
+                   "than they would by chance (1 = no association). The network shows the strongest pairs by lift.",
+                   className="section-title-description"),
             html.Div([
-                html.Label("Filter by Exposure Level", style={'fontWeight': 'bold'}),
-                dcc.Dropdown(
-                    id="rose-exposure-filter",
-                    options=[{"label": e, "value": e} for e in exposure_levels],
-                    multi=True, placeholder="All Exposure Levels"
-                )
-            ], className="dropdown-right"),
-        ], className="dropdown-container"),
-        dcc.Graph(id="motivation-exposure-rose", style={'height': '600px'})
-    ], className="section"),
-    # =================================================================
-    # --- SECTION 7: Attacker Sophistication ---
-    # =================================================================
-    html.Div([
-        html.H2("Attacker Techniques", className="section-title"),
-        html.P("Distribution of technique density based on their combination of usage", className="section-title-description"),
-        dcc.Graph(id="sophistication-bar-viz", style={'height': '450px'}),
-        dcc.Graph(id="technique-combinations-viz", style={'height': '500px'})
-    ], className="section"),
-
-], className="app-container")
+                html.Div([
+                    html.Label("Labels", style={'fontWeight': 'bold'}),
+                    dcc.RadioItems(
+                        id="pairs-dimension",
+                        options=[{"label": " " + name, "value": col} for col, name in PAIR_DIMENSIONS.items()],
+                        value="Techniques Used", inline=True
+                    ),
+                    html.Label("Show", style={'fontWeight': 'bold'}),
+                    dcc.RadioItems(
+                        id="pairs-metric",
+                        options=[{"label": " " + name, "value": metric} for metric, name in PAIR_METRICS.items()],
+                        value="count", inline=True
+                    ),
+                ], className="dropdown-left"),
+
+                html.Div([
+                    html.Label("Filter by Threat Actor", style={'fontWeight': 'bold'}),
+                    dcc.Dropdown(
+                        id="pairs-actor-filter",
+                        options=options["pairs-actor-filter"],
+                        multi=True, placeholder="All Threat Actors"
+                    )
+                ], className="dropdown-right"),
+            ], className="dropdown-container"),
+            dcc.Graph(id="label-pairs-heatmap", style={'height': '600px'}),
+            dcc.Graph(id="label-pairs-network", style={'height': '600px'})
+        ], className="section"),
+
+    ], className="app-container")
+    # The unfiltered figures come with the page instead of one callback each
+    for component in layout._traverse():
+        if isinstance(component, dcc.Graph) and component.id in state["figures"]:
+            component.figure = state["figures"][component.id]
+    return layout
+
+def serve_layout():
+    live = live_page
+    if live is not None and live["version"] == dataset.version:
+        return build_layout(live, version=live["version"])
+    return build_layout(live or saved_page)
+
+app.layout = serve_layout
 
 # ==============================================================================
 # 6. CALLBACKS
 # ==============================================================================
-@callback(
-    [
-        Output("main-viz", "figure"),
-        Output("network-graph", "figure"),
-        Output("root-asset-viz", "figure"),
-        Output("protection-sensitivity-heatmap", "figure"),
-        Output("actor-protection-viz", "figure"),
-        Output("tech-sens-distribution-bar", "figure"),
-        Output("motivation-exposure-rose", "figure"),
-        Output("sophistication-bar-viz", "figure"),
-        Output("technique-combinations-viz", "figure")
-    ],
-    [
-        Input("threat-actor-filter", "value"),
-        Input("technique-filter", "value"),
-        Input("root-cause-filter", "value"),
-        Input("asset-type-filter", "value"),
-        Input("section5-technique-filter", "value"),
-        Input("rose-motivation-filter","value"),
-        Input("rose-exposure-filter","value"),
-        Input("s4-actor-filter", "value"),      
-        Input("s4-protection-filter", "value"),
-        Input("sensitivity-score-filter", "value"),
-    ]
-)
-def update_dashboard(selected_ta, selected_tech, selected_root, selected_asset, 
-                     selected_section5_tech, rose_motivation_filter, rose_exposure_filter, 
-                     s4_ta, s4_prot, selected_scores):
+figure_cache = FigureCache(lambda: dataset.version, FIGURE_CACHE_ENTRIES, FIGURE_CACHE_BYTES)
 
-    # --- 6.1 Data Filtering: Main Viz ---
-    f_df_exp = df_exploded.copy()
-    fig = create_main_bar(f_df_exp, df_exploded,selected_ta, selected_tech, ACCESSIBLE_PALETTE)
+@register_figure("main-viz", ["threat-actor-filter", "technique-filter", "incident-search", "unique-incidents"])
+@figure_cache.cached
+def update_main_bar(selected_ta, selected_tech, query, unique):
+    return create_main_bar(dataset.store.view(query, unique), selected_ta, selected_tech, ACCESSIBLE_PALETTE)
 
-    # --- 6.2 Network graph ---
-    fig_network = create_network_graph(df_exploded, ACCESSIBLE_PALETTE)
+@register_figure("network-graph", ["incident-search", "unique-incidents"], background=True)
+@figure_cache.cached
+def update_network_graph(query, unique):
+    return create_network_graph(dataset.store.view(query, unique), ACCESSIBLE_PALETTE, top_n=NETWORK_TOP_N)
 
-    # --- 6.3 Motivation/Asset Viz ---
-    fig_root_asset = motiv_asset (df,selected_root, selected_asset)
+@register_figure("root-asset-viz", ["root-cause-filter", "asset-type-filter", "incident-search", "unique-incidents"])
+@figure_cache.cached
+def update_root_asset(selected_root, selected_asset, query, unique):
+    return motiv_asset(dataset.store.view(query, unique), selected_root, selected_asset)
 
-    # --- 6.4 Heatmap ---
-    fig_heatmap = heatmap (df, selected_ta)
+@register_figure("protection-sensitivity-heatmap", ["threat-actor-filter", "incident-search", "unique-incidents"])
+@figure_cache.cached
+def update_heatmap(selected_ta, query, unique):
+    return heatmap(dataset.store.view(query, unique), selected_ta)
 
-    # --- 6.5 Security Posture ---
-    fig_actor_protection = actor_protection(df,s4_ta, s4_prot)
+@register_figure("actor-protection-viz", ["s4-actor-filter", "s4-protection-filter", "incident-search", "unique-incidents"])
+@figure_cache.cached
+def update_actor_protection(s4_ta, s4_prot, query, unique):
+    return actor_protection(dataset.store.view(query, unique), s4_ta, s4_prot)
 
-    # --- 6.6 Tech/Sens Distribution (Section 5) ---
-    fig_tech_sens= tech_sensitivity(df_exploded, selected_scores,selected_section5_tech)
+@register_figure("tech-sens-distribution-bar", ["sensitivity-score-filter", "section5-technique-filter", "incident-search", "unique-incidents"], background=True)
+@figure_cache.cached
+def update_tech_sensitivity(selected_scores, selected_section5_tech, query, unique):
+    return tech_sensitivity(dataset.store.view(query, unique), selected_scores, selected_section5_tech)
 
-    # --- 6.7 Rose Plot ---
-    fig_rose= motiv_exposure(df,rose_motivation_filter,rose_exposure_filter)
-    
-    # --- 6.8 Sophistication Bar ---
-    fig_soph= sophistication_bar (df,selected_ta)
+@register_figure("motivation-exposure-rose", ["rose-motivation-filter", "rose-exposure-filter", "incident-search", "unique-incidents"])
+@figure_cache.cached
+def update_rose(rose_motivation_filter, rose_exposure_filter, query, unique):
+    return motiv_exposure(dataset.store.view(query, unique), rose_motivation_filter, rose_exposure_filter)
 
-    # --- 6.9 Technique Combinations ---
-    fig_combo= tech_combination (df, selected_ta, format_combo)
-    
-    return fig, fig_network, fig_root_asset, fig_heatmap, fig_actor_protection, fig_tech_sens, fig_rose, fig_soph, fig_combo
+@register_figure("sophistication-bar-viz", ["threat-actor-filter", "incident-search", "unique-incidents"])
+@figure_cache.cached
+def update_sophistication(selected_ta, query, unique):
+    return sophistication_bar(dataset.store.view(query, unique), selected_ta)
+
+@register_figure("technique-combinations-viz", ["threat-actor-filter", "incident-search", "unique-incidents"], background=True)
+@figure_cache.cached
+def update_combinations(selected_ta, query, unique):
+    return tech_combination(dataset.store.view(query, unique), selected_ta)
+
+@register_figure("trend-viz", ["trend-group-by", "trend-granularity", "trend-dates.start_date",
+                              "trend-dates.end_date", "trend-actor-filter", "incident-search", "unique-incidents"])
+@figure_cache.cached
+def update_trend(group_by, granularity, start_date, end_date, selected_ta, query, unique):
+    return trend_line(dataset.store.view(query, unique), group_by, granularity, start_date, end_date, selected_ta, ACCESSIBLE_PALETTE)
+
+@register_figure("label-pairs-heatmap", ["pairs-dimension", "pairs-metric", "pairs-actor-filter",
+                                        "incident-search", "unique-incidents"])
+@figure_cache.cached
+def update_label_heatmap(col, metric, selected_ta, query, unique):
+    return label_heatmap(dataset.store.view(query, unique), col, metric, selected_ta)
+
+@register_figure("label-pairs-network", ["pairs-dimension", "pairs-actor-filter", "incident-search", "unique-incidents"],
+                 background=True)
+@figure_cache.cached
+def update_label_network(col, selected_ta, query, unique):
+    return label_network(dataset.store.view(query, unique), col, selected_ta, ACCESSIBLE_PALETTE, top_n=PAIR_NETWORK_TOP_N)
+
+# --- Data-only updates used when LEAN_UPDATES is on ---
+@register_series("main-viz")
+def series_main_bar(selected_ta, selected_tech, query, unique):
+    return main_bar_series(dataset.store.view(query, unique), selected_ta, selected_tech)
+
+@register_series("root-asset-viz")
+def series_root_asset(selected_root, selected_asset, query, unique):
+    return motiv_asset_series(dataset.store.view(query, unique), selected_root, selected_asset)
+
+@register_series("protection-sensitivity-heatmap")
+def series_heatmap(selected_ta, query, unique):
+    return heatmap_series(dataset.store.view(query, unique), selected_ta)
+
+@register_series("actor-protection-viz")
+def series_actor_protection(s4_ta, s4_prot, query, unique):
+    return actor_protection_series(dataset.store.view(query, unique), s4_ta, s4_prot)
+
+@register_series("tech-sens-distribution-bar")
+def series_tech_sensitivity(selected_scores, selected_section5_tech, query, unique):
+    return tech_sensitivity_series(dataset.store.view(query, unique), selected_scores, selected_section5_tech)
+
+@register_series("motivation-exposure-rose")
+def series_rose(rose_motivation_filter, rose_exposure_filter, query, unique):
+    return motiv_exposure_series(dataset.store.view(query, unique), rose_motivation_filter, rose_exposure_filter)
+
+@register_series("sophistication-bar-viz")
+def series_sophistication(selected_ta, query, unique):
+    return sophistication_series(dataset.store.view(query, unique), selected_ta)
+
+@register_series("technique-combinations-viz")
+def series_combinations(selected_ta, query, unique):
+    return combination_series(dataset.store.view(query, unique), selected_ta)
+
+manager = (background_manager(os.path.join(CACHE_DIR, "background"), lambda: dataset.version)
+           if BACKGROUND_CALLBACKS else None)
+register_callbacks(lean=LEAN_UPDATES, manager=manager, refresh_id="dataset-version",
+                   ready=lambda: dataset.ready, prerendered=True)
+
+@callback(Output("search-summary", "children"), Input("incident-search", "value"),
+          Input("unique-incidents", "value"), Input("dataset-version", "data"))
+def update_search_summary(query, unique, _version):
+    store = dataset.store
+    if store is None:
+        return ""
+    if store.df is None:
+        return "Search and duplicate merging need the full export in memory and are off while streaming."
+    if store.text_index is None:
+        return f"This export has no {' or '.join(TEXT_COLUMNS)} column, so search and duplicate merging are off."
+    if not (query or "").strip() and not unique:
+        return ""
+    shown = store.view(query, unique).total_records
+    if not unique:
+        return f"{shown:,} of {store.total_records:,} incidents match"
+    if not (query or "").strip():
+        earlier = int(store.df[EARLIER_COLUMN].sum()) if EARLIER_COLUMN in store.df else 0
+        return (f"{shown:,} unique incidents in {store.total_records:,} reports"
+                + (f"; {earlier:,} reports are of incidents already in an earlier export" if earlier else ""))
+    return f"{shown:,} unique incidents match, out of {store.total_records:,} reports"
+
+# --- Hot reload: dropdown options and summary cards of a newly loaded export ---
+DROPDOWN_IDS = [component.id for component in build_layout(EMPTY_PAGE)._traverse()
+                if isinstance(component, dcc.Dropdown)]
+
+@callback(
+    [Output(dropdown_id, "options") for dropdown_id in DROPDOWN_IDS]
+    + [Output("summary-total-records", "children"), Output("summary-period", "children"),
+       Output("trend-dates", "min_date_allowed"), Output("trend-dates", "max_date_allowed"),
+       Output("dataset-version", "data"), Output("data-status", "children")],
+    Input("dataset-poll", "n_intervals"), State("dataset-version", "data"),
+)
+def refresh_dataset(_n_intervals, shown_version):
+    data = dataset.current
+    if data is None or data.version == shown_version:
+        raise PreventUpdate
+    new_options = dropdown_options(data.store)
+    return [new_options[dropdown_id] for dropdown_id in DROPDOWN_IDS] + [
+        f"{data.total_records:,}", data.month_name, *trend_date_bounds(data.store), data.version, "",
+    ]
+# Callback latency per figure and stage, plus cache counters, at /metrics
+metrics.init_app(app.server, figure_cache, profile_dir=PROFILE_DIR)
+# Grouped counts as JSON at /api/counts (see components/query_api.py)
+query_api.init_app(app.server, dataset)
+# Liveness and readiness checks at /healthz and /readyz
+health.init_app(app.server, dataset)
 
 # ==============================================================================
 # 7. RUN APP
 # ==============================================================================
 if __name__ == "__main__":
+    dataset.start()
     app.run(debug=True, port=8051)
\ No newline at end of file
@@ -0,0 +1,22 @@
+# Serves the dashboard with several worker processes sharing one copy of the
+# data (see components/shared_store.py):
+#
+#     gunicorn -c gunicorn.conf.py dashboard:server
+import multiprocessing
+import os
+
+os.environ.setdefault("DASHBOARD_SHARED_STORE", "1")
+
+bind = os.environ.get("DASHBOARD_BIND", "0.0.0.0:8051")
+workers = int(os.environ.get("DASHBOARD_WORKERS", multiprocessing.cpu_count()))
+# The app is imported once in the master without loading any data, so workers
+# boot and answer /healthz at once. Each worker then loads the shared store in
+# the background; the first one to get there publishes it.
+preload_app = True
+timeout = 120
+
+
+def post_fork(server, worker):
+    # Start loading now rather than on the worker's first request
+    import dashboard
+    dashboard.dataset.start()
@@ -0,0 +1,205 @@
+"""Renders every dashboard figure for a list of filter presets.
+
+    python -m reports.render --presets reports/presets.example.json --output out/2026-02
+    python -m reports.render --file incidents-export-2026-03-01.csv --formats html png svg
+    python path/to/reports/render.py --output out/2026-02   # from any folder
+
+Each preset maps filter ids (the dashboard's dropdown ids) to selected values.
+A preset with "each": "<filter id>" expands into one preset per option of that
+dropdown. Figures are written to <output>/<preset>/<graph id>.<format>, with a
+manifest.json listing the presets and their filters. The dashboard module is
+imported with DASHBOARD_OFFLINE=1, so rendering leaves the live app's
+snapshot.json alone and does not watch data/ for new exports.
+
+PNG and SVG need kaleido (and Chrome); HTML is always available.
+"""
+import argparse
+import importlib
+import json
+import multiprocessing
+import os
+import re
+import sys
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+import plotly.express as px
+import plotly.io as pio
+from plotly.offline import get_plotlyjs
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from components.figure_cache import normalise_filter  # noqa: E402
+
+IMAGE_FORMATS = ("png", "svg")
+PLOTLY_JS = "plotly.min.js"
+
+
+def slug(text):
+    return re.sub(r"[^A-Za-z0-9._-]+", "_", str(text)).strip("_") or "preset"
+
+
+def unique_slug(text, taken):
+    """slug(text), with -2, -3, ... appended while it names another preset's folder."""
+    base = candidate = slug(text)
+    n = 1
+    while candidate in taken:
+        n += 1
+        candidate = f"{base}-{n}"
+    return candidate
+
+
+def expand_presets(presets, dropdown_values):
+    """{preset name: {filter id: values}}; "each" presets become one per option.
+
+    Names that differ only in characters a folder name can't hold ("A/B",
+    "A B") get numbered folders rather than overwriting each other.
+    """
+    expanded = {}
+    for preset in presets:
+        filters = preset.get("filters", {})
+        each = preset.get("each")
+        if each is None:
+            expanded[unique_slug(preset["name"], expanded)] = filters
+            continue
+        if each not in dropdown_values:
+            raise ValueError(f"Preset {preset['name']!r}: {each!r} is not a dropdown id")
+        for value in dropdown_values[each]:
+            expanded[unique_slug(f"{preset['name']}-{value}", expanded)] = {**filters, each: [value]}
+    return expanded
+
+
+def plan_jobs(presets, registry, output_dir, figure_ids=None):
+    """One job per distinct (graph, filter values). Presets that leave a graph's
+    filters the same share its build, e.g. the unfiltered network graph."""
+    jobs = {}
+    for preset, filters in presets.items():
+        for output_id, (filter_ids, _) in registry.items():
+            if figure_ids and output_id not in figure_ids:
+                continue
+            args = tuple(filters.get(filter_id) for filter_id in filter_ids)
+            key = (output_id, tuple(normalise_filter(arg) for arg in args))
+            jobs.setdefault(key, (output_id, args, []))[2].append(os.path.join(output_dir, preset, output_id))
+    return list(jobs.values())
+
+
+def image_export_available():
+    try:
+        pio.to_image(px.bar(x=[0], y=[0]), format="png")
+        return True
+    except (ImportError, ValueError, RuntimeError) as e:
+        warnings.warn(f"PNG/SVG export unavailable, writing HTML only: {e}")
+        return False
+
+
+# ------------------------------------------------------------------------------
+# Worker side: the dashboard module (store, cubes, figure cache) is inherited
+# when forked, or imported once per worker otherwise
+# ------------------------------------------------------------------------------
+_dashboard = None
+
+
+def init_worker():
+    global _dashboard
+    if _dashboard is None:
+        _dashboard = importlib.import_module("dashboard")
+        _dashboard.dataset.load()
+
+
+def render_chunk(jobs, formats):
+    from components.registry import FIGURE_REGISTRY
+
+    images, image_paths, written = [], [], 0
+    for output_id, args, stems in jobs:
+        fig = FIGURE_REGISTRY[output_id][1](*args)
+        for stem in stems:
+            if "html" in formats:
+                # One plotly.js bundle at the top of the output directory
+                pio.write_html(fig, stem + ".html", include_plotlyjs=f"../{PLOTLY_JS}")
+                written += 1
+            for fmt in formats:
+                if fmt in IMAGE_FORMATS:
+                    images.append(fig)
+                    image_paths.append(f"{stem}.{fmt}")
+    if images:
+        # A single call reuses one browser session for the whole chunk
+        pio.write_images(images, image_paths)
+        written += len(images)
+    return written
+
+
+def render(args):
+    global _dashboard
+    if args.file:
+        os.environ["DASHBOARD_FILE"] = args.file
+    os.environ["DASHBOARD_OFFLINE"] = "1"
+    _dashboard = importlib.import_module("dashboard")
+    # Loaded here, before workers fork, so they inherit the data
+    _dashboard.dataset.load()
+    from components.registry import FIGURE_REGISTRY
+
+    if args.presets:
+        with open(args.presets) as f:
+            presets = json.load(f)["presets"]
+    else:
+        presets = [{"name": "all"}]
+    presets = expand_presets(presets, _dashboard.dropdown_values(_dashboard.dataset.store))
+
+    formats = list(dict.fromkeys(args.formats))
+    if any(fmt in IMAGE_FORMATS for fmt in formats) and not image_export_available():
+        formats = [fmt for fmt in formats if fmt not in IMAGE_FORMATS] or ["html"]
+
+    for preset in presets:
+        os.makedirs(os.path.join(args.output, preset), exist_ok=True)
+    if "html" in formats:
+        with open(os.path.join(args.output, PLOTLY_JS), "w", encoding="utf-8") as f:
+            f.write(get_plotlyjs())
+
+    jobs = plan_jobs(presets, FIGURE_REGISTRY, args.output, args.figures)
+    workers = max(1, min(args.workers, len(jobs)))
+    # Several chunks per worker keep the pool busy when figure costs differ
+    n_chunks = min(len(jobs), workers * 4)
+    chunks = [jobs[i::n_chunks] for i in range(n_chunks)]
+
+    start = time.perf_counter()
+    if workers == 1:
+        written = sum(render_chunk(chunk, formats) for chunk in chunks)
+    else:
+        method = "fork" if "fork" in multiprocessing.get_all_start_methods() else None
+        with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context(method),
+                                 initializer=init_worker) as pool:
+            written = sum(pool.map(render_chunk, chunks, [formats] * len(chunks)))
+
+    with open(os.path.join(args.output, "manifest.json"), "w") as f:
+        json.dump({
+            "dataset": _dashboard.dataset.current.file_name, "formats": formats,
+            "figures": [output_id for output_id in FIGURE_REGISTRY if not args.figures or output_id in args.figures],
+            "presets": presets,
+        }, f, indent=2)
+    print(f"{len(presets)} presets, {len(jobs)} distinct figures, {written} files "
+          f"in {time.perf_counter() - start:.1f} s -> {args.output}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--file", help="export in data/ to render (default: the dashboard's FILE_NAME)")
+    parser.add_argument("--presets", help="JSON file with a \"presets\" list (default: one unfiltered preset)")
+    parser.add_argument("--output", default="reports/out")
+    parser.add_argument("--formats", nargs="+", default=["html"], choices=["html", *IMAGE_FORMATS])
+    parser.add_argument("--figures", nargs="+", help="only these graph ids")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+    # Paths given on the command line are relative to where it was run; the
+    # dashboard's (data/, data/.cache/) to the project folder
+    args.output = os.path.abspath(args.output)
+    if args.presets:
+        args.presets = os.path.abspath(args.presets)
+    os.chdir(REPO_ROOT)
+    render(args)
+
+
+if __name__ == "__main__":
+    main()
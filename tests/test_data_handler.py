@@ -0,0 +1,56 @@
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import generate_incidents
+from components.data_handler import (
+    clean_data, combo_labels, format_combo, get_sophistication_signal, sophistication_signals,
+)
+from components.multi_label import LabelMatrix
+
+# Technique cells as they appear in exports, including the awkward ones
+EDGE_CASES = [
+    "Unknown", "unknown", " UNKNOWN ", "none", "None", "nan", "NaN", "",
+    ",", ", ,", "Phishing,", ",Phishing", "Phishing,,Brute Force", "Phishing, ",
+    "Phishing, Phishing", "phishing, Phishing", "Unknown, Unknown", "Unknown, Phishing",
+    "Brute Force, Phishing", "Phishing, Brute Force", " Valid Accounts ,Phishing ",
+    "A, B, C", "A, B, C, D", "D, C, B, A, E", "none, nan",
+]
+
+
+def split_techniques(texts):
+    # What the reference functions were applied to before the technique matrix
+    return pd.Series(texts, dtype=object).fillna("Unknown").astype(str).str.split(",").tolist()
+
+
+def assert_matches_reference(technique_lists):
+    techniques = LabelMatrix(technique_lists)
+    assert list(sophistication_signals(techniques)) == [get_sophistication_signal(v) for v in technique_lists]
+    assert list(combo_labels(techniques)) == [format_combo(v) for v in technique_lists]
+
+
+@pytest.mark.parametrize("text", EDGE_CASES)
+def test_single_edge_case_matches_reference(text):
+    assert_matches_reference(split_techniques([text]))
+
+
+def test_edge_cases_together_match_reference():
+    # One matrix over all of them, so the cases share their label columns
+    assert_matches_reference(split_techniques(EDGE_CASES + [None] + EDGE_CASES[::-1]))
+
+
+def test_no_incidents():
+    assert_matches_reference([])
+
+
+@pytest.mark.parametrize("options", [
+    dict(n_rows=5_000, seed=1),
+    dict(n_rows=5_000, n_techniques=30, mean_techniques=3.5, unknown_technique_share=0.2, seed=2),
+])
+def test_synthetic_export_matches_reference(options):
+    raw = generate_incidents(**options)
+    reference = split_techniques(raw["Techniques Used"])
+    assert_matches_reference(reference)
+
+    df, _ = clean_data(raw.copy())
+    assert list(df["Sophistication_Category"]) == [get_sophistication_signal(v) for v in reference]
+    assert list(df["Combination"]) == [format_combo(v) for v in reference]
@@ -0,0 +1,81 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from components import data_handler
+from components.dedup import SIMILARITY, Fingerprints
+from components.text_index import tokenize
+
+
+def reports(n_incidents, seed):
+    # Incidents of 20 random words, half of them reported again with one word changed
+    rng = np.random.default_rng(seed)
+    words = [f"w{i}" for i in range(3_000)]
+    texts = []
+    for _ in range(n_incidents):
+        text = list(rng.choice(words, 20))
+        texts.append(" ".join(text))
+        if rng.random() < 0.5:
+            text[rng.integers(20)] = "changed"
+            texts.append(" ".join(text))
+    texts += ["", None, "single"]
+    rng.shuffle(texts)
+    return pd.DataFrame({"Title (Company)": "Acme", "Description": texts})
+
+
+def shingle_set(text):
+    words = tokenize(text)
+    return set(zip(words, words[1:])) if len(words) > 1 else {tuple(words)} - {()}
+
+
+def texts_of(df):
+    return pd.factorize(df["Title (Company)"] + " " + df["Description"].fillna(""))[1]
+
+
+@pytest.fixture(scope="module")
+def exports():
+    df = reports(1_500, seed=5)
+    return df.iloc[:1_200].reset_index(drop=True), df.iloc[1_200:].reset_index(drop=True)
+
+
+def test_matches_finds_every_near_duplicate_in_the_other_export(exports):
+    earlier, later = exports
+    found = Fingerprints.from_frame(later).matches(Fingerprints.from_frame(earlier))
+
+    earlier_sets = [s for s in map(shingle_set, texts_of(earlier)) if s]
+    expected = [bool(s) and any(len(s & o) / len(s | o) >= SIMILARITY for o in earlier_sets)
+                for s in map(shingle_set, texts_of(later))]
+    assert expected.count(True) > 100
+    assert list(found) == expected
+
+
+def test_saved_fingerprints_match_like_fresh_ones(exports, tmp_path):
+    earlier, later = exports
+    Fingerprints.from_frame(earlier).save(tmp_path)
+    own = Fingerprints.from_frame(later)
+    assert (own.matches(Fingerprints.load(tmp_path)) == own.matches(Fingerprints.from_frame(earlier))).all()
+
+
+def test_reported_earlier_marks_whole_groups(exports, tmp_path, monkeypatch):
+    earlier, later = exports
+    monkeypatch.setattr(data_handler, "DATA_DIR", str(tmp_path))
+    monkeypatch.setattr(data_handler, "CACHE_DIR", str(tmp_path / ".cache"))
+    earlier.to_csv(tmp_path / "export-1.csv", sep=";", index=False, encoding="utf-8-sig")
+    later.to_csv(tmp_path / "export-2.csv", sep=";", index=False, encoding="utf-8-sig")
+    os.utime(tmp_path / "export-1.csv", ns=(0, 10**18))
+    os.utime(tmp_path / "export-2.csv", ns=(0, 2 * 10**18))
+    later = pd.read_csv(tmp_path / "export-2.csv", sep=";", encoding="utf-8-sig")
+    later["Duplicate Of"] = Fingerprints.from_frame(later).duplicate_of()
+
+    marked = data_handler.reported_earlier("export-2.csv", later, "export-*.csv")
+    own = Fingerprints.from_frame(later)
+    seen = own.matches(Fingerprints.from_frame(earlier))[own.codes]
+    # A group is marked as a whole when any of its reports was seen before
+    expected = later.assign(seen=seen).groupby("Duplicate Of")["seen"].transform("any").to_numpy()
+    assert seen.any() and not seen.all()
+    assert (marked == expected).all()
+    # Nothing is earlier than the oldest export
+    assert not data_handler.reported_earlier("export-1.csv", earlier.assign(**{
+        "Duplicate Of": Fingerprints.from_frame(earlier).duplicate_of()}), "export-*.csv").any()
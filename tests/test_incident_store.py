@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.synthetic import generate_incidents
+from components.data_handler import clean_data
+from components.incident_store import IncidentStore
+
+MASKS = ["all", "random"]
+TECHNIQUES = [None, ["Phishing", "Brute Force", "Not A Technique"]]
+
+
+@pytest.fixture(scope="module")
+def cleaned():
+    raw = generate_incidents(n_rows=3_000, n_techniques=12, mean_techniques=2.5, seed=3)
+    # An incident listing a technique twice counts it twice
+    raw.loc[:9, "Techniques Used"] = "Phishing, Phishing, Brute Force"
+    df, _ = clean_data(raw)
+    return df
+
+
+@pytest.fixture(scope="module")
+def store(cleaned):
+    return IncidentStore(cleaned)
+
+
+def incident_mask(kind, n_rows):
+    return None if kind == "all" else np.random.default_rng(0).random(n_rows) < 0.4
+
+
+def exploded_counts(df, col, mask, techniques, name="Count"):
+    # What the technique graphs computed from df_exploded before the matrix
+    rows = df if mask is None else df[mask]
+    exploded = rows.explode("Techniques Used")
+    if techniques is not None:
+        exploded = exploded[exploded["Techniques Used"].isin(techniques)]
+    return exploded.groupby([col, "Techniques Used"], observed=True).size().reset_index(name=name)
+
+
+def normalise(table):
+    columns = [col for col in table.columns if col != "Count"]
+    return (table.astype({col: str for col in columns}).astype({"Count": np.int64})
+            .sort_values(columns).reset_index(drop=True))
+
+
+@pytest.mark.parametrize("mask_kind", MASKS)
+@pytest.mark.parametrize("techniques", TECHNIQUES)
+@pytest.mark.parametrize("col", ["Threat Actor", "Sensitivity_Label", "Data Protection State"])
+def test_technique_counts_match_explode(store, cleaned, col, mask_kind, techniques):
+    mask = incident_mask(mask_kind, len(cleaned))
+    expected = exploded_counts(cleaned, col, mask, techniques)
+    got = store.technique_counts(col, mask, techniques)
+    assert list(got.columns) == [col, "Techniques Used", "Count"]
+    pd.testing.assert_frame_equal(normalise(got), normalise(expected[got.columns]))
+
+
+@pytest.mark.parametrize("mask_kind", MASKS)
+@pytest.mark.parametrize("techniques", TECHNIQUES)
+def test_actor_and_sensitivity_helpers(store, cleaned, mask_kind, techniques):
+    mask = incident_mask(mask_kind, len(cleaned))
+    actors = store.actor_technique_counts(mask, techniques, name="Count")
+    pd.testing.assert_frame_equal(
+        normalise(actors), normalise(exploded_counts(cleaned, "Threat Actor", mask, techniques)),
+    )
+    sensitivity = store.technique_sensitivity_counts(mask, techniques)
+    assert list(sensitivity.columns) == ["Techniques Used", "Sensitivity_Label", "Count"]
+    expected = exploded_counts(cleaned, "Sensitivity_Label", mask, techniques)
+    pd.testing.assert_frame_equal(normalise(sensitivity), normalise(expected[sensitivity.columns]))
+
+
+def test_repeated_technique_counts_twice(store):
+    counts = store.actor_technique_counts(mask=np.arange(len(store.df)) < 10, techniques=["Phishing"])
+    assert counts["Count"].sum() == 20
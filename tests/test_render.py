@@ -0,0 +1,29 @@
+import pytest
+
+from reports.render import expand_presets, slug
+
+
+def test_colliding_option_values_get_their_own_presets():
+    presets = expand_presets(
+        [{"name": "actor", "each": "threat-actor-filter", "filters": {"incident-search": "ransom"}}],
+        {"threat-actor-filter": ["A/B", "A B"]},
+    )
+    assert slug("actor-A/B") == slug("actor-A B")
+    assert presets == {
+        "actor-A_B": {"incident-search": "ransom", "threat-actor-filter": ["A/B"]},
+        "actor-A_B-2": {"incident-search": "ransom", "threat-actor-filter": ["A B"]},
+    }
+
+
+def test_colliding_preset_names_get_their_own_presets():
+    presets = expand_presets(
+        [{"name": "Q1 / EU", "filters": {"a": [1]}}, {"name": "Q1 EU", "filters": {"a": [2]}},
+         {"name": "Q1_EU-2", "filters": {"a": [3]}}],
+        {},
+    )
+    assert presets == {"Q1_EU": {"a": [1]}, "Q1_EU-2": {"a": [2]}, "Q1_EU-2-2": {"a": [3]}}
+
+
+def test_each_needs_a_dropdown_id():
+    with pytest.raises(ValueError, match="not a dropdown id"):
+        expand_presets([{"name": "actor", "each": "no-such-filter"}], {})